@@ -0,0 +1,70 @@
+"""
+import_time.py — Đo thời gian cold import của xnoapi và báo lỗi nếu bị chậm lại.
+
+Mỗi lần đo chạy trong một tiến trình Python mới (cold import thật sự). Script thoát
+với mã 1 nếu:
+- median thời gian `import xnoapi` vượt --budget (giây), hoặc
+- `import xnoapi` kéo theo module nặng (pandas, numpy, requests, matplotlib, ...).
+
+Chạy:
+    python benchmarks/import_time.py                 # mặc định 7 lần, budget 0.3s
+    python benchmarks/import_time.py --budget 0.5 --runs 11 --stmt "from xnoapi import client"
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("pandas", "numpy", "requests", "matplotlib", "plotly", "quantstats", "aiohttp", "pyarrow")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+exec({stmt!r})
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(stmt: str, runs: int) -> tuple[list[float], list[str]]:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    code = _PROBE.format(stmt=stmt, heavy=HEAVY_MODULES)
+    times, heavy = [], set()
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True
+        ).stdout
+        res = json.loads(out.strip().splitlines()[-1])
+        times.append(res["seconds"])
+        heavy.update(res["heavy"])
+    return times, sorted(heavy)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--stmt", default="import xnoapi", help="câu lệnh import cần đo")
+    ap.add_argument("--runs", type=int, default=7)
+    ap.add_argument("--budget", type=float, default=0.3, help="ngưỡng median (giây)")
+    ap.add_argument("--allow-heavy", action="store_true", help="không báo lỗi khi module nặng bị import")
+    args = ap.parse_args(argv)
+
+    times, heavy = measure(args.stmt, args.runs)
+    median = statistics.median(times)
+    print(f"{args.stmt!r}: median {median * 1000:.1f} ms, min {min(times) * 1000:.1f} ms, "
+          f"max {max(times) * 1000:.1f} ms over {args.runs} runs (budget {args.budget * 1000:.0f} ms)")
+    if heavy:
+        print(f"heavy modules loaded: {', '.join(heavy)}")
+
+    failed = median > args.budget or (heavy and not args.allow_heavy)
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+ingest.py — Benchmark pipeline nạp OHLCV của get_hist (parser + end-to-end).
+
+Sinh payload XNO OHLCV giả theo mọi dạng parser hỗ trợ:
+- dict     : một khối dict-of-arrays {t,o,h,l,c,v}
+- blocks   : nhiều khối dict-of-arrays nối liền (lỗi 'Extra data' của json.loads)
+- ndjson   : mỗi dòng một bar {"time","open",...}
+- records  : mảng JSON list-of-dicts
+- csv      : time,open,high,low,close,volume
+- nested   : {"data": [{t:[...],...}, ...]} (ô chứa list -> _flatten_if_cell_is_list)
+
+và đo từng bước của stocks._parse_segment_text (giải mã JSON / _scan_all_json_blocks,
+_as_dataframe, _flatten_if_cell_is_list, _normalize_ohlcv_df), _format_date_time_output,
+fast path _segment_arrays, cùng get_hist end-to-end qua ReplayServer cục bộ (chạy ở tiến
+trình riêng để không chia GIL/bộ nhớ với phía client).
+
+Báo cáo thời gian (best of --repeat; từ 1M bar chỉ chạy 1 lần), throughput (rows/s) và bộ nhớ đỉnh (tracemalloc,
+đo ở lượt chạy riêng để không làm sai thời gian). Với --baseline, script thoát với mã 1
+nếu throughput của bước nào giảm quá --tolerance so với lần chạy đã lưu bằng --json.
+
+Chạy:
+    python benchmarks/ingest.py                                   # 1k, 10k, 100k bars (vài phút)
+    python benchmarks/ingest.py --sizes 1k,100k,1M,5M --shapes dict,blocks --no-memory
+    python benchmarks/ingest.py --sizes 5M --stages get_hist --outputs epoch
+    python benchmarks/ingest.py --json base.json                  # lưu kết quả
+    python benchmarks/ingest.py --baseline base.json --tolerance 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from xnoapi.vn.data import stocks  # noqa: E402
+
+SHAPES = ("dict", "blocks", "ndjson", "records", "csv", "nested")
+STAGES = (
+    "decode",
+    "_as_dataframe",
+    "_flatten_if_cell_is_list",
+    "_normalize_ohlcv_df",
+    "_format_date_time_output",
+    "_segment_arrays",
+    "get_hist",
+)
+_PAGE = 500  # số bar mỗi khối, như một trang của API thật
+_START = 1_600_000_000
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if mult > 1 else text) * mult)
+
+
+# ───────────────────────── Payloads ─────────────────────────
+
+def make_bars(n: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    c = np.round(20.0 * np.exp(np.cumsum(rng.normal(0.0, 1e-3, n))), 2)
+    o = np.concatenate([[c[0]], c[:-1]]) if n else c
+    return {
+        "t": _START + 60 * np.arange(n, dtype=np.int64),
+        "o": o,
+        "h": np.round(np.maximum(o, c) + 0.05, 2),
+        "l": np.round(np.minimum(o, c) - 0.05, 2),
+        "c": c,
+        "v": rng.integers(100, 100_000, n),
+    }
+
+
+def _columns(bars: Dict[str, np.ndarray], lo: int = 0, hi: Optional[int] = None) -> Dict[str, list]:
+    return {k: v[lo:hi].tolist() for k, v in bars.items()}
+
+
+def _rows(bars: Dict[str, np.ndarray]) -> List[dict]:
+    names = ("time", "open", "high", "low", "close", "volume")
+    cols = [bars[k].tolist() for k in ("t", "o", "h", "l", "c", "v")]
+    return [dict(zip(names, row)) for row in zip(*cols)]
+
+
+def make_payload(shape: str, bars: Dict[str, np.ndarray]) -> str:
+    n = len(bars["t"])
+    if shape == "dict":
+        return json.dumps(_columns(bars))
+    if shape == "blocks":
+        return "".join(json.dumps(_columns(bars, i, i + _PAGE)) for i in range(0, n, _PAGE))
+    if shape == "ndjson":
+        return "\n".join(json.dumps(r) for r in _rows(bars))
+    if shape == "records":
+        return json.dumps(_rows(bars))
+    if shape == "csv":
+        cols = [bars[k] for k in ("t", "o", "h", "l", "c", "v")]
+        lines = ["time,open,high,low,close,volume"]
+        lines.extend(f"{t},{o},{h},{l},{c},{v}" for t, o, h, l, c, v in zip(*(x.tolist() for x in cols)))
+        return "\n".join(lines)
+    if shape == "nested":
+        return json.dumps({"data": [_columns(bars, i, i + _PAGE) for i in range(0, n, _PAGE)]})
+    raise ValueError(f"shape không hợp lệ: {shape}")
+
+
+def decode(text: str) -> Tuple[str, Any]:
+    """Bước giải mã của stocks._parse_segment_text; trả về (hàm thực sự dùng, parsed)."""
+    try:
+        return "json.loads", json.loads(text)
+    except Exception:
+        pass
+    blocks = stocks._scan_all_json_blocks(text)
+    if blocks:
+        if all(isinstance(b, dict) and {"t", "o", "h", "l", "c"}.issubset(b.keys()) for b in blocks):
+            return "_scan_all_json_blocks", stocks._merge_ohlcv_dict_blocks(blocks)
+        return "_scan_all_json_blocks", blocks
+    return "_json_relaxed", stocks._json_relaxed(text)
+
+
+# ───────────────────────── Measurement ─────────────────────────
+
+def measure(fn: Callable[[], Any], repeat: int, memory: bool) -> Tuple[float, Optional[float], Any]:
+    """(best seconds, peak MB hoặc None, kết quả lần chạy cuối)."""
+    best = float("inf")
+    result = None
+    for _ in range(max(1, repeat)):
+        result = None
+        gc.collect()
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    peak = None
+    if memory:
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = fn()
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return best, peak, result
+
+
+def _repeat(repeat: int, n: int) -> int:
+    return repeat if n < 1_000_000 else 1
+
+
+def bench_parser(shape: str, n: int, stages, repeat: int, memory: bool, out: List[dict]) -> None:
+    text = make_payload(shape, make_bars(n))
+
+    def record(stage: str, fn: Callable[[], Any], feeds_next: bool = True) -> Any:
+        if stage.split(":")[0] not in stages:
+            return fn() if feeds_next else None
+        seconds, peak, result = measure(fn, repeat, memory)
+        emit(out, {"shape": shape, "bars": n, "stage": stage, "seconds": seconds, "peak_mb": peak})
+        return result
+
+    used, parsed = decode(text)
+    record(f"decode:{used}", lambda: decode(text)[1])
+    df = record("_as_dataframe", lambda: stocks._as_dataframe(parsed, text))
+    df = record("_flatten_if_cell_is_list", lambda: stocks._flatten_if_cell_is_list(df))
+    df = record("_normalize_ohlcv_df", lambda: stocks._normalize_ohlcv_df(df))
+    if len(df) != n:
+        raise AssertionError(f"{shape}: parse được {len(df)} / {n} bar")
+    record("_format_date_time_output", lambda: stocks._format_date_time_output(df), feeds_next=False)
+    record("_segment_arrays", lambda: stocks._segment_arrays(text), feeds_next=False)
+
+
+_SERVE = """
+import sys
+sys.path.insert(0, {root!r})
+from xnoapi.vn.data.replay import ReplayServer
+srv = ReplayServer(page_size={page_size}).start()
+for sym, n in {series!r}:
+    srv.add_ohlcv(sym, "m", n, start={start})
+print(srv.url, flush=True)
+sys.stdin.read()
+"""
+
+
+def bench_e2e(sizes: List[int], outputs, repeat: int, memory: bool, page_size: int, out: List[dict]) -> None:
+    """get_hist qua ReplayServer ở tiến trình con (mỗi size là một mã riêng)."""
+    from xnoapi.vn.data.ratelimit import configure_rate_limit
+    from xnoapi.vn.data.replay import redirect
+    from xnoapi.vn.data.utils import Config
+
+    series = [(f"B{n}", n) for n in sizes]
+    # get_hist dừng sau _MAX_REQUESTS trang: nâng page size để size lớn vẫn tải đủ
+    need = -(-max(sizes) // stocks._MAX_REQUESTS)
+    if need > page_size:
+        print(f"# page size {page_size} -> {need} (get_hist giới hạn {stocks._MAX_REQUESTS} trang)", file=sys.stderr)
+        page_size = need
+    code = _SERVE.format(root=ROOT, page_size=page_size, series=series, start=_START)
+    proc = subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        url = proc.stdout.readline().strip()
+        if not url:
+            raise RuntimeError("ReplayServer không khởi động được")
+        Config._api_key = Config._api_key or "bench"
+        configure_rate_limit(enabled=False)
+        with redirect(url):
+            for sym, n in series:
+                for output in outputs:
+                    seconds, peak, df = measure(
+                        lambda: stocks.get_hist(sym, "m", output=output), _repeat(repeat, n), memory
+                    )
+                    if len(df) != n:
+                        raise AssertionError(f"get_hist({sym}): {len(df)} / {n} bar")
+                    emit(out, {"shape": f"e2e/{output}", "bars": n, "stage": "get_hist",
+                               "seconds": seconds, "peak_mb": peak})
+    finally:
+        proc.stdin.close()
+        proc.wait(timeout=10)
+
+
+# ───────────────────────── Report ─────────────────────────
+
+def _key(r: dict) -> str:
+    return f"{r['shape']}|{r['bars']}|{r['stage'].split(':')[0]}"
+
+
+def emit(results: List[dict], r: dict) -> None:
+    """Ghi nhận và in ngay một dòng kết quả (các size lớn chạy lâu)."""
+    results.append(r)
+    rate = r["bars"] / r["seconds"] if r["seconds"] > 0 else float("inf")
+    peak = f"{r['peak_mb']:.1f}" if r["peak_mb"] is not None else "-"
+    print(f"{r['shape']:<12}{r['bars']:>10}  {r['stage']:<38}{r['seconds']:>10.4f}{rate:>14,.0f}{peak:>10}", flush=True)
+
+
+def compare(results: List[dict], baseline_path: str, tolerance: float, min_seconds: float) -> List[str]:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        base = {_key(r): r for r in json.load(f)["results"]}
+    slow = []
+    for r in results:
+        b = base.get(_key(r))
+        # Bước quá ngắn chủ yếu là nhiễu đo -> không so
+        if b is None or r["seconds"] <= 0 or b["seconds"] < max(min_seconds, 1e-9):
+            continue
+        ratio = b["seconds"] / r["seconds"]  # throughput hiện tại / baseline
+        if ratio < 1.0 - tolerance:
+            slow.append(f"{_key(r)}: {ratio:.2f}x throughput baseline")
+    return slow
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="1k,10k,100k", help="số bar, ví dụ 1k,100k,1M,5M")
+    ap.add_argument("--shapes", default=",".join(SHAPES))
+    ap.add_argument("--stages", default=",".join(STAGES))
+    ap.add_argument("--outputs", default="str,epoch", help="output của get_hist end-to-end")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--page-size", type=int, default=500, help="bar mỗi trang của ReplayServer")
+    ap.add_argument("--no-memory", action="store_true", help="bỏ lượt đo bộ nhớ đỉnh")
+    ap.add_argument("--json", help="ghi kết quả ra file JSON")
+    ap.add_argument("--baseline", help="file JSON của lần chạy trước để so sánh")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="mức giảm throughput cho phép")
+    ap.add_argument("--min-seconds", type=float, default=0.01, help="bỏ qua bước ngắn hơn ngưỡng này khi so baseline")
+    args = ap.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    stages = {s.strip() for s in args.stages.split(",") if s.strip()}
+    shapes = [s.strip() for s in args.shapes.split(",") if s.strip()]
+    bad = [s for s in shapes if s not in SHAPES] + [s for s in stages if s not in STAGES]
+    if bad:
+        ap.error(f"giá trị không hợp lệ: {bad}")
+    memory = not args.no_memory
+
+    results: List[dict] = []
+    print(f"{'shape':<12}{'bars':>10}  {'stage':<38}{'seconds':>10}{'rows/s':>14}{'peak MB':>10}")
+    for shape in shapes:
+        for n in sizes:
+            bench_parser(shape, n, stages, _repeat(args.repeat, n), memory, results)
+    if "get_hist" in stages:
+        outputs = [o.strip() for o in args.outputs.split(",") if o.strip()]
+        bench_e2e(sizes, outputs, args.repeat, memory, args.page_size, results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=1)
+    if args.baseline:
+        slow = compare(results, args.baseline, args.tolerance, args.min_seconds)
+        for line in slow:
+            print(f"regression: {line}")
+        print("FAIL" if slow else "OK")
+        return 1 if slow else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,10 @@ setup(
         "requests",
         "pandas",
     ],
+    extras_require={
+        "store": ["pyarrow"],
+        "async": ["aiohttp"],
+    },
     author="xno_project",
     description="XNO API Library for Financial Data",
     long_description=open("README.md", encoding="utf-8").read(),
@@ -0,0 +1,30 @@
+import pytest
+
+from xnoapi.vn.data import ratelimit, retry
+from xnoapi.vn.data.replay import ReplayServer
+from xnoapi.vn.data.utils import Config
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setattr(Config, "_api_key", "test-key")
+
+
+@pytest.fixture(autouse=True)
+def clean_retry(monkeypatch):
+    """Retry nhanh (backoff ~1ms), circuit breaker sạch, tắt rate limit cho mỗi test."""
+    monkeypatch.setattr(ratelimit.get_rate_limiter(), "enabled", False)
+    breaker = retry.get_circuit_breaker()
+    saved = (breaker.failure_threshold, breaker.reset_timeout, breaker.enabled)
+    monkeypatch.setattr(retry, "_policy", retry.get_retry_policy())
+    retry.configure_retry(retries=3, backoff=(0.001, 0.002), failure_threshold=5, reset_timeout=30.0)
+    breaker.reset()
+    yield
+    breaker.failure_threshold, breaker.reset_timeout, breaker.enabled = saved
+    breaker.reset()
+
+
+@pytest.fixture
+def server():
+    with ReplayServer(page_size=500, seed=0) as srv:
+        yield srv
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from xnoapi.vn.data import cache as cache_mod
+from xnoapi.vn.data.cache import TTLCache, sizeof
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Đồng hồ giả cho TTL: tăng bằng clock.advance(giây)."""
+
+    class _Clock:
+        now = 1000.0
+
+        def advance(self, seconds):
+            self.now += seconds
+
+    c = _Clock()
+    monkeypatch.setattr(cache_mod.time, "monotonic", lambda: c.now)
+    return c
+
+
+def _frame(rows):
+    return pd.DataFrame({"v": np.arange(rows, dtype=np.float64)})
+
+
+def test_evicts_least_recently_used_when_over_budget():
+    one = sizeof(_frame(1000))
+    c = TTLCache(max_bytes=int(one * 2.5))
+    c.set("a", _frame(1000))
+    c.set("b", _frame(1000))
+    assert c.get("a") is not None  # a vừa dùng -> b là LRU
+    c.set("c", _frame(1000))
+    assert "b" not in c
+    assert "a" in c and "c" in c
+    assert c.evictions == 1
+    assert c.nbytes <= c.max_bytes
+
+
+def test_entry_larger_than_budget_is_not_stored():
+    c = TTLCache(max_bytes=100)
+    c.set("big", _frame(1000))
+    assert "big" not in c
+    assert c.nbytes == 0
+
+
+def test_resize_evicts_down_to_new_budget():
+    one = sizeof(_frame(100))
+    c = TTLCache(max_bytes=one * 10)
+    for i in range(5):
+        c.set(i, _frame(100))
+    c.resize(one * 2)
+    assert len(c) == 2
+    assert [k for k in range(5) if k in c] == [3, 4]
+
+
+def test_ttl_expiry(clock):
+    c = TTLCache(default_ttl=10)
+    c.set("price", 1)
+    c.set("fund", 2, ttl=None)
+    c.set("tick", 3, ttl=1)
+    clock.advance(5)
+    assert c.get("tick") is None
+    assert c.get("price") == 1
+    clock.advance(5)
+    assert c.get("price") is None
+    assert c.get("fund") == 2
+    assert c.expirations == 2
+
+
+def test_hit_miss_counters(clock):
+    c = TTLCache()
+    c.set("k", 1, ttl=1)
+    c.get("k")
+    c.get("missing")
+    clock.advance(2)
+    c.get("k")
+    assert (c.hits, c.misses, c.expirations) == (1, 2, 1)
+
+
+def test_overwrite_replaces_size():
+    c = TTLCache()
+    c.set("k", _frame(1000))
+    c.set("k", _frame(10))
+    assert c.nbytes == sizeof(_frame(10))
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from xnoapi.vn.data import stocks
+
+START = 1_700_000_000
+
+
+@pytest.fixture
+def hist(server):
+    server.add_ohlcv("HPG", "m", bars=3000, start=START)
+    server.add_ohlcv("VCB", "h", bars=1200, start=START, seed=3)
+    with server.redirect():
+        yield server
+
+
+def test_full_history_paginates(hist):
+    df = stocks.get_hist("HPG", "m")
+    assert len(df) == 3000
+    assert hist.stats()["pages"] == 7  # 6 trang 500 bar + 1 trang rỗng
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+@pytest.mark.parametrize("chunk_days", [0.1, 0.3, None])
+def test_range_chunked_equals_single_pass(hist, max_workers, chunk_days):
+    full = stocks.get_hist("HPG", "m", output="epoch")
+    start, end = START + 600 * 60, START + 2500 * 60
+    expected = full[(full["epoch"] >= start) & (full["epoch"] <= end)].reset_index(drop=True)
+
+    got = stocks.get_hist(
+        "HPG", "m", start=start, end=end, output="epoch", max_workers=max_workers, chunk_days=chunk_days
+    )
+    assert got.equals(expected)
+
+
+def test_range_output_modes_agree(hist):
+    start, end = START + 100 * 3600, START + 900 * 3600
+    s = stocks.get_hist("VCB", "h", start=start, end=end, chunk_days=5)
+    e = stocks.get_hist("VCB", "h", start=start, end=end, chunk_days=5, output="epoch")
+    d = stocks.get_hist("VCB", "h", start=start, end=end, chunk_days=5, output="datetime")
+    assert len(s) == len(e) == len(d) == 801
+    assert e["epoch"].iloc[0] == start and e["epoch"].iloc[-1] == end
+    assert (d.index.astype("int64") // 10**9).tolist() == e["epoch"].tolist()
+
+
+def test_store_sync_equals_direct(hist, tmp_path):
+    pytest.importorskip("pyarrow")
+    direct = stocks.get_hist("VCB", "h")
+    first = stocks.get_hist("VCB", "h", store=str(tmp_path))
+    pages = hist.stats()["pages"]
+    again = stocks.get_hist("VCB", "h", store=str(tmp_path))
+    assert first.equals(direct) and again.equals(direct)
+    assert hist.stats()["pages"] - pages <= 2  # chỉ tải lại từ bar cuối đã lưu
+
+    start, end = START + 100 * 3600, START + 900 * 3600
+    ranged = stocks.get_hist("VCB", "h", store=str(tmp_path), start=start, end=end)
+    assert ranged.equals(stocks.get_hist("VCB", "h", start=start, end=end))
+
+
+def test_async_get_hist_matches_sync(hist):
+    pytest.importorskip("aiohttp")
+    from xnoapi.vn.data import aio
+
+    start, end = START + 600 * 60, START + 2500 * 60
+    assert asyncio.run(aio.get_hist("HPG", "m")).equals(stocks.get_hist("HPG", "m"))
+    ranged = asyncio.run(aio.get_hist("HPG", "m", start=start, end=end))
+    assert ranged.equals(stocks.get_hist("HPG", "m", start=start, end=end))
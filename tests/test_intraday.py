@@ -0,0 +1,61 @@
+import json
+import warnings
+
+import pytest
+
+from xnoapi.vn.data import stocks
+from xnoapi.vn.data.stocks import Quote
+
+
+def _fake_feed(monkeypatch, bursts):
+    """
+    Thay Quote._intraday_raw bằng nguồn tick giả: `bursts` là [(truncTime, số tick), ...].
+    API thật trả tick mới nhất trước và truncTime là mốc bao gồm (<= cursor).
+    """
+    ticks = []
+    for t, n in bursts:
+        for _ in range(n):
+            ticks.append({"truncTime": t, "matchPrice": 10.0, "matchVol": 100, "matchType": "b", "id": len(ticks) + 1})
+    ticks.sort(key=lambda x: (-x["truncTime"], -x["id"]))
+    limits = []
+
+    def raw(self, limit, cursor):
+        limits.append(limit)
+        return [x for x in ticks if cursor is None or x["truncTime"] <= cursor][:limit]
+
+    monkeypatch.setattr(Quote, "_intraday_raw", raw)
+    return limits, len(ticks)
+
+
+def test_burst_larger_than_page_is_fetched_completely(monkeypatch):
+    limits, total = _fake_feed(monkeypatch, [(1_700_000_003, 2500), (1_700_000_002, 300), (1_700_000_001, 300)])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        df = Quote("HPG").intraday_all(page_size=1000)
+    assert len(df) == total
+    assert df["id"].is_unique
+    assert df["time"].is_monotonic_increasing
+    assert limits == [1000, 1000, 2000, 4000, 1000]  # limit tăng dần khi kẹt tại 1 mốc
+
+
+def test_burst_beyond_max_limit_warns_and_continues(monkeypatch):
+    limits, _ = _fake_feed(monkeypatch, [(1_700_000_003, 9000), (1_700_000_002, 300)])
+    with pytest.warns(RuntimeWarning, match="truncTime=1700000003"):
+        df = Quote("HPG").intraday_all(page_size=1000)
+    assert max(limits) == 8000
+    assert len(df) == 8000 + 300  # phần vượt 8 x page_size của mốc bị bỏ, mốc trước vẫn đủ
+    assert df["id"].is_unique
+
+
+def test_pages_do_not_repeat_ticks(monkeypatch):
+    _fake_feed(monkeypatch, [(1_700_000_003, 700), (1_700_000_002, 300)])
+    pages = list(Quote("HPG").iter_intraday(page_size=1000))
+    ids = [i for p in pages for i in p["id"].tolist()]
+    assert len(ids) == len(set(ids)) == 1000
+
+
+def test_cursor_is_json_serializable():
+    _, cursor = stocks._intraday_page(
+        [{"truncTime": 1, "matchPrice": 1.0, "matchVol": 1, "matchType": "b", "id": 1}]
+    )
+    json.dumps(cursor)
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from xnoapi.vn.data import retry, session
+from xnoapi.vn.data.replay import ReplayServer
+from xnoapi.vn.data.retry import CircuitOpenError
+
+
+def _first_success(seed, error_rate):
+    """Số request ReplayServer(seed=seed, error_rate=...) cần tới response thành công đầu tiên."""
+    rng = random.Random(seed)
+    n = 1
+    while rng.random() < error_rate:
+        n += 1
+    return n
+
+
+def test_retry_exhausted_returns_last_error(server):
+    server.error_rate = 1.0
+    r = session.request("GET", server.url + "/x")
+    assert r.status_code == 503
+    assert server.stats()["requests"] == retry.get_retry_policy().retries + 1
+
+
+def test_retry_until_success():
+    expected = _first_success(7, 0.5)
+    assert 1 < expected <= retry.get_retry_policy().retries + 1  # seed 7: lỗi vài lần rồi hồi phục
+    with ReplayServer(error_rate=0.5, seed=7) as srv:
+        r = session.request("GET", srv.url + "/x")
+        assert r.status_code == 404  # không có fixture: lỗi không retry
+        assert srv.stats()["requests"] == expected
+        assert retry.get_circuit_breaker().state(srv.url) == "closed"
+
+
+def test_retry_after_header_is_honoured(server, monkeypatch):
+    server.error_rate = 1.0
+    server.retry_after = 0
+    delays = []
+    monkeypatch.setattr(session.time, "sleep", delays.append)
+    session.request("GET", server.url + "/x")
+    assert delays == [0.0] * retry.get_retry_policy().retries
+
+
+def test_breaker_counts_one_failure_per_call(server):
+    breaker = retry.get_circuit_breaker()
+    server.error_rate = 1.0
+    for _ in range(breaker.failure_threshold - 1):
+        session.request("GET", server.url + "/x")
+    assert breaker.state(server.url) == "closed"
+    session.request("GET", server.url + "/x")
+    assert breaker.state(server.url) == "open"
+
+    before = server.stats()["requests"]
+    with pytest.raises(CircuitOpenError):
+        session.request("GET", server.url + "/x")
+    assert server.stats()["requests"] == before  # fail fast, không gửi request
+
+
+def test_breaker_half_open_trial(server):
+    breaker = retry.get_circuit_breaker()
+    retry.configure_retry(retries=0, failure_threshold=1, reset_timeout=0.0)
+    server.error_rate = 1.0
+    session.request("GET", server.url + "/x")
+    assert breaker.state(server.url) == "half-open"
+
+    # Lượt thử half-open thành công -> đóng mạch
+    server.error_rate = 0.0
+    session.request("GET", server.url + "/x")
+    assert breaker.state(server.url) == "closed"
+
+
+def test_breaker_released_when_call_is_interrupted(server, monkeypatch):
+    breaker = retry.get_circuit_breaker()
+    retry.configure_retry(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure(server.url)
+
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(session.get_session(), "request", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        session.request("GET", server.url + "/x")
+    # Không ghi lỗi cho host, và lượt thử half-open được trả lại
+    assert breaker._state["127.0.0.1"]["failures"] == 1
+    breaker.before_call(server.url)
@@ -4,7 +4,6 @@ from typing import TypedDict, List, Dict, Union
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
 
 class HistoryRecord(TypedDict):
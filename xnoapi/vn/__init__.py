@@ -1 +1,10 @@
-from xnoapi.vn import data, metrics
+# Submodule được import khi truy cập lần đầu (xnoapi.vn.data / xnoapi.vn.metrics)
+__all__ = ["data", "metrics"]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        import importlib
+
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(name)
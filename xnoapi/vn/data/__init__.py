@@ -3,54 +3,89 @@ from __future__ import annotations
 # Public constants/helpers
 from .const import *  # noqa: F401,F403
 
-# Core helpers (do NOT import merge_fund_into_price here to avoid hard dependency)
-from .core import (
-    add_all_fund_features,
-    add_all_ta_features,
-    fund_feature,
-    merge_fund_into_price,
-    send_request,
-)
-
-# Derivatives theme
-from .derivatives import get_hist as get_derivatives_hist
-
-# Stocks theme (consolidated)
-from .stocks import (
-    FX,
-    MSN,
-    Company,
-    Crypto,
-    Finance,
-    Fund,
-    Global,
-    Listing,
-    Quote,
-    Trading,
-    WorldIndex,
-)
-from .stocks import get_hist as get_stock_hist
-from .stocks import (
-    get_indices,
-    get_market_index_snapshot,
-    get_stock_foreign_trading,
-    get_stock_info,
-    get_stock_matches,
-    get_stock_top_price,
-    list_liquid_asset,
-    ping,
-)
-
-# Other helpers
-from .utils import *  # noqa: F401,F403
+# Các submodule nặng (pandas/numpy/requests, ...) chỉ được import khi dùng tới tên tương ứng
+# (PEP 562 module __getattr__), nên `import xnoapi` / `client(...)` khởi động nhanh.
+_LAZY = {
+    # Core helpers
+    "add_all_fund_features": ("core", "add_all_fund_features"),
+    "add_all_ta_features": ("core", "add_all_ta_features"),
+    "cache_stats": ("core", "cache_stats"),
+    "clear_cache": ("core", "clear_cache"),
+    "configure_cache": ("core", "configure_cache"),
+    "fund_feature": ("core", "fund_feature"),
+    "merge_fund_into_price": ("core", "merge_fund_into_price"),
+    "send_request": ("core", "send_request"),
+    # Derivatives theme
+    "get_derivatives_hist": ("derivatives", "get_hist"),
+    "get_derivatives_hist_since": ("derivatives", "get_hist_since"),
+    # Stocks theme (consolidated)
+    "FX": ("stocks", "FX"),
+    "MSN": ("stocks", "MSN"),
+    "Company": ("stocks", "Company"),
+    "Crypto": ("stocks", "Crypto"),
+    "Finance": ("stocks", "Finance"),
+    "Fund": ("stocks", "Fund"),
+    "Global": ("stocks", "Global"),
+    "Listing": ("stocks", "Listing"),
+    "Quote": ("stocks", "Quote"),
+    "Trading": ("stocks", "Trading"),
+    "WorldIndex": ("stocks", "WorldIndex"),
+    "get_stock_hist": ("stocks", "get_hist"),
+    # Backward-compatibility: default get_hist refers to stocks
+    "get_hist": ("stocks", "get_hist"),
+    "get_stock_hist_many": ("stocks", "get_hist_many"),
+    "iter_stock_hist": ("stocks", "iter_hist"),
+    "get_intraday_many": ("stocks", "get_intraday_many"),
+    "get_indices": ("stocks", "get_indices"),
+    "get_market_index_snapshot": ("stocks", "get_market_index_snapshot"),
+    "get_stock_foreign_trading": ("stocks", "get_stock_foreign_trading"),
+    "get_stock_info": ("stocks", "get_stock_info"),
+    "get_stock_matches": ("stocks", "get_stock_matches"),
+    "get_stock_top_price": ("stocks", "get_stock_top_price"),
+    "list_liquid_asset": ("stocks", "list_liquid_asset"),
+    "ping": ("stocks", "ping"),
+    # Shared HTTP session
+    "configure_session": ("session", "configure_session"),
+    "configure_rate_limit": ("ratelimit", "configure_rate_limit"),
+    "configure_retry": ("retry", "configure_retry"),
+    "CircuitOpenError": ("retry", "CircuitOpenError"),
+    "configure_singleflight": ("singleflight", "configure_singleflight"),
+    "configure_http_cache": ("httpcache", "configure_http_cache"),
+    "configure_hedging": ("hedge", "configure_hedging"),
+    # Instrumentation
+    "configure_instrumentation": ("instrument", "configure_instrumentation"),
+    "get_metrics_registry": ("instrument", "get_registry"),
+    "prometheus_text": ("instrument", "prometheus_text"),
+    # Local OHLCV store
+    "OHLCVStore": ("store", "OHLCVStore"),
+    # Financial statements panel
+    "StatementStore": ("statements", "StatementStore"),
+    "load_statements": ("statements", "load_statements"),
+}
 
-# Backward-compatibility: default get_hist refers to stocks
-get_hist = get_stock_hist
+_SUBMODULES = {
+    "aio", "cache", "const", "core", "derivatives", "hedge", "httpcache", "instrument", "ratelimit",
+    "replay", "retry", "session", "singleflight", "statements", "stocks", "store", "utils",
+}
+
+# Other helpers (nhẹ: chỉ urllib)
+from .utils import *  # noqa: F401,F403
 
 
-# ========== Dynamic single-feature API (module-level) ==========
 # ========== Dynamic single-feature API (module-level) ==========
 def __getattr__(name: str):
+    if name in _LAZY:
+        import importlib
+
+        mod_name, attr = _LAZY[name]
+        value = getattr(importlib.import_module(f".{mod_name}", __name__), attr)
+        globals()[name] = value  # lần sau không qua __getattr__
+        return value
+    if name in _SUBMODULES:
+        import importlib
+
+        return importlib.import_module(f".{name}", __name__)
+
     # Fallback: danh sách feature hợp lệ nếu core không export _FUND_CANONICAL_NAMES
     _fallback = {
         "earningPerShare",
@@ -130,6 +165,19 @@ def __getattr__(name: str):
 __all__ = [
     # helpers
     "send_request",
+    "configure_session",
+    "configure_rate_limit",
+    "configure_retry",
+    "CircuitOpenError",
+    "configure_singleflight",
+    "configure_http_cache",
+    "configure_hedging",
+    "configure_instrumentation",
+    "get_metrics_registry",
+    "prometheus_text",
+    "configure_cache",
+    "cache_stats",
+    "clear_cache",
     # core bulk adders
     "add_all_ta_features",
     "add_all_fund_features",
@@ -148,6 +196,12 @@ __all__ = [
     "list_liquid_asset",
     "get_stock_hist",
     "get_hist",
+    "get_stock_hist_many",
+    "iter_stock_hist",
+    "get_intraday_many",
+    "OHLCVStore",
+    "StatementStore",
+    "load_statements",
     "ping",
     "get_indices",
     "get_market_index_snapshot",
@@ -158,5 +212,10 @@ __all__ = [
     "Trading",
     # derivatives
     "get_derivatives_hist",
+    "get_derivatives_hist_since",
     "merge_fund_into_price",
 ]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,369 @@
+"""
+aio.py — Bản asyncio của các API dữ liệu (quant-data XNO + TCBS).
+
+Dùng trong ứng dụng asyncio để giữ nhiều request song song trên một event loop
+thay vì đẩy từng lời gọi blocking vào executor. Cần `aiohttp` (pip install aiohttp).
+
+Ví dụ:
+    async with AsyncClient() as c:
+        hpg, vcb = await asyncio.gather(c.get_hist("HPG", "h"), c.get_stock_info("VCB"))
+
+Parser/chuẩn hóa dùng chung với `stocks.py`, nên output giống hệt bản đồng bộ.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import json
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+from .core import _ua
+from .instrument import get_registry
+from .ratelimit import get_rate_limiter
+from .retry import CircuitOpenError, RetryPolicy, get_circuit_breaker, get_retry_policy, parse_retry_after
+from .session import rewrite_url
+from .stocks import (
+    FIN_MAP,
+    PERIOD_MAP,
+    QUANT_BASE_URL,
+    APIError,
+    _END_OF_TIME,
+    _STOCKS_API_BASE,
+    _MAX_REQUESTS,
+    _TIMEOUT,
+    _OUTPUT_MODES,
+    _OHLCVBuffer,
+    _append_segment_text,
+    _create_dataframe_with_columns,
+    _format_output,
+    _get_auth_header,
+    _parse_json_text,
+    _slice_epoch_range,
+    _to_unix_timestamp,
+)
+from .utils import Config
+
+__all__ = [
+    "AsyncClient",
+    "get_hist",
+    "get_stock_info",
+    "get_stock_matches",
+    "get_market_index_snapshot",
+    "ratio_summary",
+    "finance",
+]
+
+_TCBS_BASE = "https://apipubaws.tcbs.com.vn/tcanalysis"
+
+
+def _observe(method: str, url: str, start: float, status: Any, nbytes: int, payload: Any, retries: int) -> None:
+    registry = get_registry()
+    if registry.enabled:
+        registry.observe_request(
+            method, url, status=status, seconds=time.monotonic() - start, bytes_in=nbytes,
+            bytes_out=len(json.dumps(payload)) if payload is not None else 0, retries=retries,
+        )
+
+
+def _require_aiohttp():
+    try:
+        import aiohttp
+    except Exception as e:
+        raise ImportError("Thiếu thư viện 'aiohttp'. Hãy cài: pip install aiohttp") from e
+    return aiohttp
+
+
+class AsyncClient:
+    """
+    Async HTTP client for the XNO quant-data and TCBS endpoints.
+
+    Parameters
+    ----------
+    limit : int, optional
+        Max simultaneous connections overall, by default 100.
+    limit_per_host : int, optional
+        Max simultaneous connections per host, by default 32.
+    timeout : float, optional
+        Total timeout per request in seconds, by default 30.
+    """
+
+    def __init__(self, *, limit: int = 100, limit_per_host: int = 32, timeout: float = _TIMEOUT):
+        self._aiohttp = _require_aiohttp()
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self._session = None
+
+    async def __aenter__(self) -> "AsyncClient":
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Đóng aiohttp session (giải phóng kết nối)."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _ensure_session(self):
+        if self._session is None or self._session.closed:
+            aiohttp = self._aiohttp
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                auto_decompress=True,
+            )
+        return self._session
+
+    # ───────────────────────── Transport ─────────────────────────
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        payload: Any = None,
+        retry: Optional[RetryPolicy] = None,
+    ) -> Tuple[int, str, str]:
+        """
+        Gửi 1 request (rate limit + retry/circuit breaker dùng chung với bản sync);
+        trả về (status, content_type, text). Raise nếu status cuối cùng là lỗi.
+        """
+        aiohttp = self._aiohttp
+        session = self._ensure_session()
+        policy = retry if retry is not None else get_retry_policy()
+        limiter = get_rate_limiter()
+        breaker = get_circuit_breaker()
+
+        start = time.monotonic()
+        attempt = 0
+        nbytes = 0
+        recorded = False  # đã báo kết quả lời gọi cho breaker chưa
+        try:
+            # Breaker tính theo lời gọi: kiểm tra 1 lần, ghi kết quả 1 lần sau khi hết retry
+            breaker.before_call(url)
+            while True:
+                delay = limiter.reserve(url)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    async with session.request(
+                        method.upper(), rewrite_url(url), headers=headers, params=params, json=payload
+                    ) as resp:
+                        limiter.feedback(url, resp.status)
+                        text = await resp.text()
+                        nbytes = resp.content_length or len(text)
+                        retryable = policy.is_retryable_status(resp.status)
+                        wait = None
+                        if retryable and attempt < policy.retries:
+                            wait = policy.delay(attempt, parse_retry_after(resp.headers.get("Retry-After")))
+                        if wait is None:
+                            if retryable:
+                                breaker.record_failure(url)
+                            else:
+                                breaker.record_success(url)
+                            recorded = True
+                            resp.raise_for_status()
+                            _observe(method, url, start, resp.status, nbytes, payload, attempt)
+                            return resp.status, resp.headers.get("Content-Type", ""), text
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                    if attempt >= policy.retries:
+                        raise
+                    wait = policy.delay(attempt)
+                await asyncio.sleep(wait)
+                attempt += 1
+        except Exception as e:
+            # Lỗi không retry (ClientPayloadError...) vẫn phải báo breaker, nếu không
+            # lượt thử half-open bị giữ mãi và host bị chặn vĩnh viễn.
+            if not recorded and not isinstance(e, CircuitOpenError):
+                breaker.record_failure(url)
+            status = e.status if isinstance(e, aiohttp.ClientResponseError) else type(e).__name__
+            _observe(method, url, start, status, nbytes, payload, attempt)
+            raise
+        except BaseException:
+            # Task bị hủy (wait_for timeout, gather hủy...): không phải lỗi của host
+            breaker.release(url)
+            raise
+
+    async def send_request(
+        self,
+        url: str,
+        method: str = "GET",
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        payload: Any = None,
+        retries: int = 2,
+        backoff: Tuple[float, float] = (0.6, 1.2),
+    ) -> Any:
+        """Async mirror of `core.send_request` (JSON nếu Content-Type là JSON, ngược lại text)."""
+        h = _ua()
+        if headers:
+            h.update(headers)
+        policy = RetryPolicy(retries=retries, backoff=backoff, max_delay=get_retry_policy().max_delay)
+        _, ctype, text = await self._request(method, url, headers=h, params=params, payload=payload, retry=policy)
+        if "application/json" in ctype:
+            return json.loads(text)
+        return text
+
+    async def _quant_get(self, url: str) -> Any:
+        headers = _get_auth_header()
+        try:
+            _, _, text = await self._request("GET", url, headers=headers)
+        except (self._aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError) as e:
+            # Như stocks._make_request: breaker đang mở cũng là APIError với caller
+            raise APIError(f"Request failed: {e}") from e
+        return _parse_json_text(text)
+
+    # ───────────────────────── quant-data ─────────────────────────
+
+    async def get_stock_info(self, symbol: str) -> pd.DataFrame:
+        symbol = (symbol or "").strip().upper()
+        data = await self._quant_get(f"{QUANT_BASE_URL}/v1/stocks/{symbol}/stock-info")
+        return pd.DataFrame([data])
+
+    async def get_stock_matches(self, symbol: str) -> pd.DataFrame:
+        symbol = (symbol or "").strip().upper()
+        data = await self._quant_get(f"{QUANT_BASE_URL}/v1/stocks/{symbol}/matches")
+        return _create_dataframe_with_columns(data, columns=['time', 'symbol', 'price', 'volume', 'side'])
+
+    async def get_market_index_snapshot(self, index_symbol: str) -> pd.DataFrame:
+        index_symbol = (index_symbol or "").strip().upper()
+        data = await self._quant_get(f"{QUANT_BASE_URL}/v1/indices/{index_symbol}/market-index")
+        return pd.DataFrame([data])
+
+    async def _fetch_segment_text(
+        self, symbol: str, resolution: str, start_from: int, api_token: str, end_to: int = _END_OF_TIME
+    ) -> str:
+        url = f"{_STOCKS_API_BASE}/{symbol}/ohlcv/{resolution}"
+        params = {"from": start_from, "to": end_to}
+        headers = {"accept": "application/json", "Authorization": api_token}
+        _, _, text = await self._request("GET", url, headers=headers, params=params)
+        return text
+
+    async def get_hist(
+        self,
+        asset_name: str,
+        resolution: str = "m",
+        output: str = "str",
+        *,
+        start: Union[int, float, str, dt.date, dt.datetime, None] = None,
+        end: Union[int, float, str, dt.date, dt.datetime, None] = None,
+    ) -> pd.DataFrame:
+        """
+        Async mirror of `stocks.get_hist` (cùng output ["Date","time","Open",...,"volume"]).
+
+        start/end giống bản sync nhưng phân trang tuần tự (không chia chunk song song; chạy
+        nhiều get_hist bằng asyncio.gather thay cho max_workers). Không hỗ trợ `store` vì
+        OHLCVStore đọc/ghi đĩa blocking: dùng
+        ``await asyncio.to_thread(stocks.get_hist, ..., store=...)`` nếu cần.
+        """
+        if not isinstance(asset_name, str) or not asset_name.strip():
+            raise ValueError("asset_name phải là chuỗi hợp lệ (ví dụ: 'HPG').")
+        res = (resolution or "m").lower()
+        if res not in {"m", "h"}:
+            raise ValueError("resolution chỉ được phép 'm' hoặc 'h'.")
+        if output not in _OUTPUT_MODES:
+            raise ValueError(f"output chỉ được phép {sorted(_OUTPUT_MODES)}.")
+
+        token = Config.get_api_key()
+        symbol = asset_name.strip().upper()
+        step = 60 if res == "m" else 3600
+
+        start_ts = _to_unix_timestamp(start) if start is not None else None
+        end_ts = _to_unix_timestamp(end) if end is not None else None
+        if start_ts is not None and end_ts is not None and end_ts < start_ts:
+            raise ValueError("end phải >= start.")
+        end_to = end_ts if end_ts is not None else _END_OF_TIME
+
+        buf = _OHLCVBuffer()
+        current_from = start_ts if start_ts is not None else 0
+        last_epoch_seen = -1
+        pages = 0
+        for _ in range(_MAX_REQUESTS):
+            text = await self._fetch_segment_text(symbol, res, current_from, token, end_to)
+            pages += 1
+            seg_last = _append_segment_text(buf, text)
+            if seg_last is None or seg_last <= last_epoch_seen:
+                break
+            last_epoch_seen = seg_last
+            current_from = seg_last + step
+            if current_from > end_to:
+                break
+
+        get_registry().observe_pages("aio.get_hist", pages)
+        return _format_output(_slice_epoch_range(buf.to_frame(), start_ts, end_ts), output)
+
+    # ───────────────────────── TCBS ─────────────────────────
+
+    async def ratio_summary(self, symbol: str) -> pd.DataFrame:
+        """Async mirror of `Company(symbol).ratio_summary()`."""
+        try:
+            data = await self.send_request(f"{_TCBS_BASE}/v1/ticker/{symbol}/ratios")
+            return pd.DataFrame(data, index=[0]) if isinstance(data, dict) else pd.DataFrame(data)
+        except Exception:
+            data = await self.send_request(f"{_TCBS_BASE}/v1/finance/{symbol}/financialratio")
+            return pd.DataFrame(data)
+
+    async def finance(self, symbol: str, report: str, period: str = 'year', dropna: bool = False) -> pd.DataFrame:
+        """Async mirror of `Finance(symbol)._fetch(report, period)`."""
+        assert report in FIN_MAP, f"Invalid report: {report}"
+        url = f"{_TCBS_BASE}/v1/finance/{symbol}/{FIN_MAP[report]}"
+        params = {"period": PERIOD_MAP.get(period, 1), "size": 1000}
+        data = await self.send_request(url, params=params)
+        df = pd.DataFrame(data)
+        if dropna:
+            df = df.dropna(axis=1, how="all")
+        return df
+
+
+# ───────────────────────── Module-level shortcuts ─────────────────────────
+# Mỗi hàm nhận `client` tùy chọn; nếu không truyền, tạo client tạm cho 1 lần gọi.
+
+async def _call(client: Optional[AsyncClient], name: str, *args, **kwargs):
+    if client is not None:
+        return await getattr(client, name)(*args, **kwargs)
+    async with AsyncClient() as c:
+        return await getattr(c, name)(*args, **kwargs)
+
+
+async def get_hist(
+    asset_name: str,
+    resolution: str = "m",
+    output: str = "str",
+    *,
+    start: Union[int, float, str, dt.date, dt.datetime, None] = None,
+    end: Union[int, float, str, dt.date, dt.datetime, None] = None,
+    client: Optional[AsyncClient] = None,
+) -> pd.DataFrame:
+    return await _call(client, "get_hist", asset_name, resolution, output, start=start, end=end)
+
+
+async def get_stock_info(symbol: str, *, client: Optional[AsyncClient] = None) -> pd.DataFrame:
+    return await _call(client, "get_stock_info", symbol)
+
+
+async def get_stock_matches(symbol: str, *, client: Optional[AsyncClient] = None) -> pd.DataFrame:
+    return await _call(client, "get_stock_matches", symbol)
+
+
+async def get_market_index_snapshot(index_symbol: str, *, client: Optional[AsyncClient] = None) -> pd.DataFrame:
+    return await _call(client, "get_market_index_snapshot", index_symbol)
+
+
+async def ratio_summary(symbol: str, *, client: Optional[AsyncClient] = None) -> pd.DataFrame:
+    return await _call(client, "ratio_summary", symbol)
+
+
+async def finance(
+    symbol: str, report: str, period: str = 'year', dropna: bool = False, *, client: Optional[AsyncClient] = None
+) -> pd.DataFrame:
+    return await _call(client, "finance", symbol, report, period, dropna)
@@ -0,0 +1,161 @@
+"""
+cache.py — Cache trong bộ nhớ có giới hạn dung lượng (bytes), LRU + TTL theo entry.
+
+Dùng cho dữ liệu giá/fundamental mà các hàm feature (fund_feature, roe('VCB'), ...)
+tái sử dụng giữa nhiều lần gọi. Khác dict thường:
+- giới hạn theo tổng bytes ước lượng (DataFrame đo bằng memory_usage(deep=True))
+- vượt giới hạn -> bỏ entry ít dùng gần đây nhất (LRU)
+- mỗi entry có TTL riêng (giá intraday hết hạn nhanh, fundamental quý giữ lâu)
+- thread-safe, có bộ đếm hit/miss/eviction
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import pandas as pd
+
+from .instrument import get_registry
+
+__all__ = ["TTLCache", "sizeof"]
+
+_MISSING = object()
+
+
+def sizeof(value: Any) -> int:
+    """Ước lượng số bytes của 1 giá trị cache (DataFrame/Series đo sâu, còn lại getsizeof)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, (bytes, bytearray, str)):
+        return sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache bounded by total bytes, with per-entry TTL.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Upper bound for the summed size of all entries, by default 512 MiB.
+        An entry larger than this is not stored.
+    default_ttl : float or None, optional
+        TTL in seconds for entries set without an explicit ttl; None means
+        no expiry, by default None.
+    name : str, optional
+        If given, hits/misses are also reported to the instrumentation
+        registry under this cache name, by default None.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 512 * 1024 * 1024,
+        default_ttl: Optional[float] = None,
+        name: Optional[str] = None,
+    ):
+        self.max_bytes = int(max_bytes)
+        self.default_ttl = default_ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, _count=False) is not _MISSING
+
+    def _drop(self, key: Hashable) -> None:
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable, default: Any = None, *, _count: bool = True) -> Any:
+        """Trả về value còn hạn (và đánh dấu vừa dùng), ngược lại default."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[2] is not None and item[2] <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                item = None
+            if item is None:
+                if _count:
+                    self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                if _count:
+                    self.hits += 1
+        if _count and self.name is not None:
+            get_registry().observe_cache(self.name, "miss" if item is None else "hit")
+        return default if item is None else item[0]
+
+    def set(self, key: Hashable, value: Any, *, ttl: Optional[float] = _MISSING) -> None:
+        """Lưu value với TTL (giây; None = không hết hạn; bỏ qua = default_ttl)."""
+        ttl = self.default_ttl if ttl is _MISSING else ttl
+        size = sizeof(value)
+        expires = None if ttl is None else time.monotonic() + float(ttl)
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size, expires)
+            self._bytes += size
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._data:
+            self._drop(next(iter(self._data)))
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data[key][0]
+            self._drop(key)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def resize(self, max_bytes: int) -> None:
+        """Đổi giới hạn bytes (evict ngay nếu đang vượt)."""
+        with self._lock:
+            self.max_bytes = int(max_bytes)
+            self._evict()
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> Dict[str, int]:
+        """Bộ đếm: entries, bytes, max_bytes, hits, misses, evictions, expirations."""
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
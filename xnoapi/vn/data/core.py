@@ -1,12 +1,57 @@
 
-import time, random, requests
 import pandas as pd
 import numpy as np
 
+from . import session as _http
+from .retry import RetryPolicy, get_retry_policy
+from .singleflight import get_singleflight, request_key
+from .cache import TTLCache
+from .httpcache import get_http_cache
+
 DEFAULT_TIMEOUT = 25
 
+# Cache giá/fundamental cho các hàm feature: giới hạn theo bytes (LRU), TTL theo loại dữ liệu
+_PRICE_TTL = {"m": 60.0, "h": 15 * 60.0}  # giây; giá intraday hết hạn nhanh
+_FUND_TTL = 24 * 3600.0  # fundamental theo quý -> giữ lâu
+
 if "_CACHE" not in globals():
-    _CACHE = {}
+    _CACHE = TTLCache(max_bytes=512 * 1024 * 1024, name="core")
+
+
+def configure_cache(*, max_bytes=None, price_ttl=None, fund_ttl=None):
+    """
+    Cấu hình cache giá/fundamental dùng bởi fund_feature và các hàm feature động.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Tổng dung lượng tối đa (bytes); vượt thì bỏ entry ít dùng nhất.
+    price_ttl : float or dict, optional
+        TTL (giây) cho giá; dict theo timeframe, ví dụ {"m": 30, "h": 600}.
+    fund_ttl : float, optional
+        TTL (giây) cho dữ liệu fundamental (raw và FUND đầy đủ).
+    """
+    global _FUND_TTL
+    if max_bytes is not None:
+        _CACHE.resize(max_bytes)
+    if price_ttl is not None:
+        if isinstance(price_ttl, dict):
+            _PRICE_TTL.update({k: float(v) for k, v in price_ttl.items()})
+        else:
+            for k in list(_PRICE_TTL):
+                _PRICE_TTL[k] = float(price_ttl)
+    if fund_ttl is not None:
+        _FUND_TTL = float(fund_ttl)
+
+
+def cache_stats():
+    """Bộ đếm của cache giá/fundamental (entries, bytes, hits, misses, evictions, ...)."""
+    return _CACHE.stats()
+
+
+def clear_cache():
+    """Xóa toàn bộ cache giá/fundamental."""
+    _CACHE.clear()
 
 def _fetch_price_df(symbol: str, timeframe: str = "h") -> pd.DataFrame:
     try:
@@ -64,11 +109,19 @@ def merge_fund_into_price(
     """
     out = price_df.copy()
 
-    # 1) dt ở bảng giá
-    if price_time_col in out.columns and price_time_col is not None:
+    # 1) dt ở bảng giá (DatetimeIndex / cột datetime / epoch giây -> dùng trực tiếp, không qua string)
+    if price_date_col not in out.columns and isinstance(out.index, pd.DatetimeIndex):
+        out["dt"] = out.index
+        out = out.reset_index(drop=True)
+    elif price_date_col not in out.columns and "epoch" in out.columns:
+        out["dt"] = pd.to_datetime(out["epoch"], unit="s")
+    elif pd.api.types.is_datetime64_any_dtype(out[price_date_col]):
+        out["dt"] = out[price_date_col]
+    elif price_time_col in out.columns and price_time_col is not None:
         out["dt"] = pd.to_datetime(out[price_date_col].astype(str) + " " + out[price_time_col].astype(str))
     else:
         out["dt"] = pd.to_datetime(out[price_date_col])
+    out["dt"] = out["dt"].astype("datetime64[ns]")
 
     # 2) ticker ở bảng giá (nếu thiếu)
     if ticker_col not in out.columns:
@@ -91,6 +144,7 @@ def merge_fund_into_price(
         f["effective_date"] = f["report_date"] + pd.to_timedelta(report_release_lag_days, unit="D")
     else:
         f["effective_date"] = f["report_date"]
+    f["effective_date"] = pd.to_datetime(f["effective_date"]).astype("datetime64[ns]")
 
     # 5) Chọn cột merge
     id_cols = {ticker_col, year_col, quarter_col, "report_date", "effective_date"}
@@ -128,23 +182,31 @@ def _ua(source="vietmarket"):
 
 def send_request(url, method="GET", headers=None, params=None, payload=None,
                  retries=2, backoff=(0.6, 1.2), timeout=DEFAULT_TIMEOUT):
+    # Retry (backoff lũy thừa, Retry-After, circuit breaker) nằm trong session.request;
+    # 4xx không retryable trả về ngay.
     h = _ua()
     if headers:
         h.update(headers)
-    for attempt in range(retries + 1):
-        try:
-            if method.upper() == "GET":
-                r = requests.get(url, headers=h, params=params, timeout=timeout)
-            else:
-                r = requests.post(url, headers=h, params=params, json=payload, timeout=timeout)
-            r.raise_for_status()
-            if "application/json" in r.headers.get("Content-Type", ""):
-                return r.json()
-            return r.text
-        except Exception:
-            if attempt >= retries:
-                raise
-            time.sleep(random.uniform(*backoff))
+    # Các thread gọi trùng method+URL+params+body cùng lúc chỉ gửi 1 request và dùng chung kết quả.
+    policy = RetryPolicy(retries=retries, backoff=backoff, max_delay=get_retry_policy().max_delay)
+    is_get = method.upper() == "GET"
+
+    def _get(extra):
+        return _http.request("GET", url, headers={**h, **extra}, params=params, timeout=timeout, retry=policy)
+
+    def _fetch():
+        if is_get:
+            # Endpoint thay đổi chậm (company/finance) -> cache đĩa + conditional request
+            r = get_http_cache().fetch(url, params, _get)
+        else:
+            r = _http.request(method, url, headers=h, params=params, json=payload, timeout=timeout, retry=policy)
+        r.raise_for_status()
+        if "application/json" in r.headers.get("Content-Type", ""):
+            return r.json()
+        return r.text
+
+    key = request_key(method, url, params=params, payload=None if is_get else payload, headers=h)
+    return get_singleflight().do(key, _fetch)
 
 
 def add_all_ta_features(
@@ -826,13 +888,28 @@ _BASE_FUND_COLS = {
     "creditGrowth",
 }
 
-# cache now stores: {"price": df, "fund_raw": df, "fund_full": df or None}
+# cache entries: ("price", symbol, timeframe), ("fund_raw", symbol), ("fund_full", symbol)
 def _auto_get(symbol: str, *, timeframe: str = "h", force_refresh: bool = False):
-    key = f"{symbol}|{timeframe}"
-    cache_hit = (not force_refresh) and (key in _CACHE)
-    if cache_hit and "price" in _CACHE[key] and "fund_raw" in _CACHE[key]:
-        return _CACHE[key]["price"], _CACHE[key]["fund_raw"], _CACHE[key].get("fund_full")
+    price_key, raw_key, full_key = ("price", symbol, timeframe), ("fund_raw", symbol), ("fund_full", symbol)
+    if force_refresh:
+        for k in (price_key, raw_key, full_key):
+            _CACHE.pop(k)
+
+    # Nhiều feature của cùng symbol được gọi song song -> chỉ 1 lần tải giá + ratio_summary
+    df_price = _CACHE.get(price_key)
+    if df_price is None:
+        df_price = get_singleflight().do(price_key, lambda: _load_price(symbol, timeframe))
+    df_raw = _CACHE.get(raw_key)
+    if df_raw is None:
+        df_raw = get_singleflight().do(raw_key, lambda: _load_fund_raw(symbol))
+    return df_price, df_raw, _CACHE.get(full_key)
+
+def _load_price(symbol: str, timeframe: str) -> pd.DataFrame:
     df_price = _fetch_price_df(symbol, timeframe=timeframe)
+    _CACHE.set(("price", symbol, timeframe), df_price, ttl=_PRICE_TTL.get(timeframe, _PRICE_TTL["h"]))
+    return df_price
+
+def _load_fund_raw(symbol: str) -> pd.DataFrame:
     # fetch raw fund without computing derived features
     try:
         from xnoapi.vn.data import Company
@@ -843,23 +920,26 @@ def _auto_get(symbol: str, *, timeframe: str = "h", force_refresh: bool = False)
         df_raw = df_raw.copy(); df_raw["ticker"] = symbol
     if "year" not in df_raw.columns or "quarter" not in df_raw.columns:
         raise KeyError("ratio_summary() cần có cột 'year' và 'quarter'")
-    _CACHE[key] = {"price": df_price, "fund_raw": df_raw, "fund_full": None}
-    return df_price, df_raw, None
+    _CACHE.set(("fund_raw", symbol), df_raw, ttl=_FUND_TTL)
+    return df_raw
 
 def _get_fund_frame_for_feature(symbol: str, timeframe: str, feature_name: str, *, force_refresh: bool):
     """Return a DataFrame that contains the requested feature.
     - If it's a base column and exists in raw, return raw.
     - Otherwise, compute full FUND on demand (once), cache it, and return that.
     """
-    key = f"{symbol}|{timeframe}"
+    full_key = ("fund_full", symbol)
     p, raw, full = _auto_get(symbol, timeframe=timeframe, force_refresh=force_refresh)
     # If base & present -> use raw
     if feature_name in raw.columns:
         return p, raw
-    # Else compute (or reuse cached) full
-    if full is None or force_refresh:
-        full = add_all_fund_features(raw, ticker_col="ticker", year_col="year", quarter_col="quarter")
-        _CACHE[key]["fund_full"] = full
+    # Else compute (or reuse cached) full; force_refresh đã xóa entry cũ trong _auto_get
+    if full is None:
+        def _compute():
+            out = add_all_fund_features(raw, ticker_col="ticker", year_col="year", quarter_col="quarter")
+            _CACHE.set(full_key, out, ttl=_FUND_TTL)
+            return out
+        full = get_singleflight().do(full_key, _compute)
     return p, full
 
 
@@ -1,19 +1,110 @@
 import io
 import gzip
+import time
 import base64
-import requests
+import datetime as dt
+from typing import Union
+
+import numpy as np
 import pandas as pd
 
+from . import session as _http
+from .instrument import get_registry
+from .singleflight import get_singleflight
+from .store import OHLCVStore, _as_store
 from .utils import Config
 
 # Định nghĩa các thành phần public của module
-__all__ = ["get_hist"]
+__all__ = ["get_hist", "get_hist_since"]
 
 # Lấy URL của Lambda function từ Config
 LAMBDA_URL = Config.get_link()
 
+# Kiểu dữ liệu cố định cho các cột giá/thời gian của CSV trả về (bỏ bước đoán kiểu
+# của read_csv); cột không có trong file được bỏ qua. Cột volume vẫn để read_csv/Arrow
+# tự suy ra (int64 như trước, float64 nếu có ô trống).
+_CSV_DTYPES = {
+    "Date": str,
+    "time": str,
+    "Open": np.float64,
+    "High": np.float64,
+    "Low": np.float64,
+    "Close": np.float64,
+}
+_CSV_ENGINES = {"c", "pyarrow"}
+_B64_CHUNK = 1 << 20  # số ký tự base64 giải mã mỗi lần (bội số của 4)
+_DEFAULT_MAX_AGE = 60.0  # giây; trong khoảng này get_hist(store=...) đọc thẳng từ đĩa
+_RAW = "raw:"  # tiền tố cột giữ nguyên bản frame trong OHLCVStore
+_RAW_INDEX = "raw:__index__"
+_EXCHANGE_TZ = "Asia/Ho_Chi_Minh"  # cột Date/time là giờ sàn (UTC+7), không kèm múi giờ
+
+
+class _Base64Reader(io.RawIOBase):
+    """File-like đọc bytes đã giải mã từ chuỗi base64 theo từng chunk (không tạo bản copy đầy đủ)."""
+
+    def __init__(self, text: str, chunk: int = _B64_CHUNK):
+        if any(c in text for c in " \r\n\t"):
+            text = "".join(text.split())
+        self._text = text
+        self._pos = 0
+        self._chunk = chunk
+        self._buf = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if not self._buf:
+            if self._pos >= len(self._text):
+                return 0
+            piece = self._text[self._pos:self._pos + self._chunk]
+            self._pos += self._chunk
+            self._buf = base64.b64decode(piece)
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
 
-def get_hist(symbol: str, frequency: str):
+
+def _read_payload_csv(b64: str, engine: str = "c") -> pd.DataFrame:
+    """
+    Giải mã base64 -> gunzip -> parse CSV theo luồng: chỉ giữ từng chunk nhỏ trong bộ nhớ
+    thay vì bytes đã giải mã + bytes giải nén + str UTF-8.
+    """
+    raw = io.BufferedReader(_Base64Reader(b64), buffer_size=_B64_CHUNK)
+    if engine == "pyarrow":
+        return _read_csv_pyarrow(raw)
+    with gzip.GzipFile(fileobj=raw, mode="rb") as gz:
+        df = pd.read_csv(gz, index_col=0, dtype=_CSV_DTYPES, encoding="utf-8")
+    return df
+
+
+def _read_csv_pyarrow(raw) -> pd.DataFrame:
+    # Giải nén + parse đa luồng ngay trong Arrow (nhanh hơn read_csv(engine="pyarrow") trên GzipFile)
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except Exception as e:
+        raise ImportError("Thiếu thư viện 'pyarrow'. Hãy cài: pip install pyarrow") from e
+    types = {name: pa.string() if t is str else pa.float64() for name, t in _CSV_DTYPES.items()}
+    stream = pa.CompressedInputStream(pa.PythonFile(raw, mode="r"), "gzip")
+    table = pa_csv.read_csv(stream, convert_options=pa_csv.ConvertOptions(column_types=types))
+    df = table.to_pandas()
+    index_col = df.columns[0]
+    df = df.set_index(index_col)
+    if index_col == "" or str(index_col).startswith("Unnamed"):
+        df.index.name = None
+    return df
+
+
+def get_hist(
+    symbol: str,
+    frequency: str,
+    *,
+    engine: str = "c",
+    store: Union[OHLCVStore, str, None] = None,
+    max_age: float = _DEFAULT_MAX_AGE,
+):
     """
     Get historical data of derivatives VN30F1M and VN30F2M.
 
@@ -23,6 +114,14 @@ def get_hist(symbol: str, frequency: str):
         Derivatives symbol (e.g. "VN30F1M", "VN30F2M").
     frequency : str
         Timeframe to get data (e.g. "1D", "1H", "5M").
+    engine : str, optional
+        CSV parser: "c" (default) or "pyarrow" (faster on long history,
+        requires pyarrow).
+    store : OHLCVStore or str, optional
+        Local cache (OHLCVStore or directory). Each refresh is merged into the
+        (symbol, frequency) partition; calls within `max_age` read it from disk.
+    max_age : float, optional
+        Freshness window in seconds for `store`, by default 60.
     Returns
     -------
     dict
@@ -33,10 +132,63 @@ def get_hist(symbol: str, frequency: str):
     Exception
         If there is an error when calling the API.
     """
+    if engine not in _CSV_ENGINES:
+        raise ValueError(f"engine chỉ được phép {sorted(_CSV_ENGINES)}.")
+    store = _as_store(store)
+    if store is None:
+        return _download(symbol, frequency, engine)
+
+    path = store.path(symbol, frequency)
+    fresh = _is_fresh(store, symbol, frequency, max_age)
+    get_registry().observe_cache("derivatives_store", "hit" if fresh else "miss")
+    if fresh:
+        return _from_store_frame(store.read(symbol, frequency))
+    # Nhiều luồng cùng thấy cache cũ -> chỉ 1 lần tải
+    key = ("derivatives", path)
+    return get_singleflight().do(key, lambda: _refresh(store, symbol, frequency, engine, max_age))
+
+
+def get_hist_since(
+    symbol: str,
+    frequency: str,
+    since: Union[int, float, str, dt.datetime],
+    *,
+    engine: str = "c",
+    store: Union[OHLCVStore, str, None] = None,
+    max_age: float = _DEFAULT_MAX_AGE,
+) -> pd.DataFrame:
+    """
+    Chỉ trả về các bar có thời điểm (Date + time) sau `since`.
+
+    Parameters
+    ----------
+    since : int, float, str or datetime
+        Mốc thời gian (không tính mốc này). Epoch giây và datetime có múi giờ được
+        đổi sang giờ sàn (Asia/Ho_Chi_Minh); chuỗi/datetime naive được hiểu là giờ
+        sàn, cùng múi giờ với cột Date/time của dữ liệu.
+    engine, store, max_age :
+        Như get_hist; nên truyền store để các lần gọi liên tiếp không tải lại.
+    """
+    df = get_hist(symbol, frequency, engine=engine, store=store, max_age=max_age)
+    if isinstance(df, dict):
+        return df
+    if "Date" not in df.columns:
+        raise ValueError(f"Dữ liệu không có cột Date/time để lọc theo since. Columns: {list(df.columns)}")
+    if isinstance(since, (int, float)) and not isinstance(since, bool):
+        since_ts = pd.to_datetime(int(since), unit="s", utc=True)
+    else:
+        since_ts = pd.Timestamp(since)
+    if since_ts.tzinfo is not None:
+        since_ts = since_ts.tz_convert(_EXCHANGE_TZ).tz_localize(None)
+    return df.loc[_bar_datetimes(df) > since_ts].reset_index(drop=True)
+
+
+def _download(symbol: str, frequency: str, engine: str):
     api_key = Config.get_api_key()
     payload = {"symbol": symbol, "frequency": frequency}
 
-    response = requests.post(
+    response = _http.request(
+        "POST",
         f"{LAMBDA_URL}/data-derivates",
         json=payload,
         headers={"x-api-key": api_key},
@@ -47,16 +199,75 @@ def get_hist(symbol: str, frequency: str):
 
         if isinstance(data, dict) and "base64" in data:
             try:
-                decoded_data = base64.b64decode(data["base64"])
-
-                with gzip.GzipFile(fileobj=io.BytesIO(decoded_data), mode="rb") as gz:
-                    extracted_content = gz.read().decode("utf-8")
-                    df = pd.read_csv(io.StringIO(extracted_content), index_col=0)
-                return df
-
+                return _read_payload_csv(data["base64"], engine)
+            except ImportError:
+                raise
             except Exception as e:
                 return {"error": f"Failed to process base64 data: {str(e)}"}
 
         return pd.DataFrame(data)
     else:
         raise Exception(f"Error: {response.status_code}, {response.text}")
+
+
+# ───────────────────────── Local cache ─────────────────────────
+
+def _is_fresh(store: OHLCVStore, symbol: str, frequency: str, max_age: float) -> bool:
+    modified = store.modified(symbol, frequency)
+    return modified is not None and time.time() - modified < max_age
+
+
+def _refresh(store: OHLCVStore, symbol: str, frequency: str, engine: str, max_age: float):
+    # Luồng khác có thể vừa refresh xong trong lúc chờ
+    if _is_fresh(store, symbol, frequency, max_age):
+        return _from_store_frame(store.read(symbol, frequency))
+    # Endpoint chỉ trả toàn bộ chuỗi (không có tham số from/to) -> tải đủ rồi gộp vào cache,
+    # bar trùng thời điểm giữ bản mới.
+    fresh = _download(symbol, frequency, engine)
+    if isinstance(fresh, dict) or not _storable(fresh):
+        return fresh  # lỗi hoặc JSON không đúng dạng OHLCV: trả nguyên, không ghi cache
+    store.append(symbol, frequency, _to_store_frame(fresh))
+    return _from_store_frame(store.read(symbol, frequency))
+
+
+def _bar_datetimes(df: pd.DataFrame) -> pd.Series:
+    if "time" in df.columns:
+        return pd.to_datetime(df["Date"].astype(str) + " " + df["time"].astype(str))
+    return pd.to_datetime(df["Date"])
+
+
+def _storable(df: pd.DataFrame) -> bool:
+    cols = set(df.columns)
+    return {"Date", "Open", "High", "Low", "Close"} <= cols and bool({"volume", "Volume"} & cols)
+
+
+def _to_store_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Frame get_hist -> dạng lưu của OHLCVStore: cột chuẩn (Date datetime, Open..Volume) để
+    gộp/khử trùng theo thời điểm, kèm nguyên bản frame đã giải mã (mọi cột + index CSV,
+    tiền tố ``raw:``) để đọc lại ra đúng frame như khi không dùng cache.
+    """
+    out = pd.DataFrame({"Date": _bar_datetimes(df).to_numpy()})
+    for c in ("Open", "High", "Low", "Close"):
+        out[c] = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=np.float64)
+    vol = df["volume"] if "volume" in df.columns else df["Volume"]
+    out["Volume"] = pd.to_numeric(vol, errors="coerce").to_numpy()
+    out[_RAW_INDEX] = df.index.to_numpy()
+    for c in df.columns:
+        out[_RAW + str(c)] = df[c].to_numpy()
+    return out
+
+
+def _from_store_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Ngược lại của _to_store_frame: trả về đúng frame như get_hist không cache."""
+    raw_cols = [c for c in df.columns if c.startswith(_RAW) and c != _RAW_INDEX]
+    if raw_cols:
+        index = pd.Index(df[_RAW_INDEX].to_numpy()) if _RAW_INDEX in df.columns else None
+        return pd.DataFrame({c[len(_RAW):]: df[c].to_numpy() for c in raw_cols}, index=index)
+    # Partition ghi trước khi có cột raw: dựng lại từ cột chuẩn
+    date = pd.to_datetime(df["Date"])
+    out = pd.DataFrame({"Date": date.dt.strftime("%Y-%m-%d"), "time": date.dt.strftime("%H:%M:%S")})
+    for c in ("Open", "High", "Low", "Close"):
+        out[c] = df[c].to_numpy(dtype=np.float64)
+    out["volume"] = df["Volume"].to_numpy()
+    return out
@@ -0,0 +1,209 @@
+"""
+hedge.py — Hedged requests cho các endpoint có nguồn dự phòng.
+
+Thay vì chờ nguồn chính timeout rồi mới thử nguồn phụ, `hedged()` chạy nguồn chính,
+và nếu sau một ngưỡng trễ (mặc định p95 độ trễ các lần thành công gần đây của nguồn
+chính) vẫn chưa có kết quả hợp lệ thì khởi động nguồn kế tiếp; kết quả hợp lệ đến
+trước được dùng. Nguồn nào lỗi/không hợp lệ thì nguồn kế tiếp được chạy ngay.
+
+Nếu không nguồn nào hợp lệ, kết quả (hoặc exception) của nguồn cuối cùng được trả về,
+giống hệt hành vi thử tuần tự trước đây.
+
+Dùng cho: MSN -> Yahoo (Global quotes), /ratios -> /financialratio (TCBS),
+các URL ứng viên của Fund.details.
+"""
+
+from __future__ import annotations
+
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Sequence
+
+__all__ = ["LatencyTracker", "hedged", "get_latency_tracker", "configure_hedging"]
+
+_settings: Dict[str, Any] = {
+    "enabled": True,
+    "quantile": 0.95,
+    "default_delay": 1.0,  # giây, khi chưa đủ mẫu độ trễ
+    "min_delay": 0.05,
+    "max_delay": 10.0,
+    "min_samples": 20,
+}
+
+# Pool dùng chung: request thua cuộc chạy nốt ở nền, không chặn caller
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="xnoapi-hedge")
+    return _pool
+
+
+class LatencyTracker:
+    """Rolling window of successful-call latencies per key."""
+
+    def __init__(self, window: int = 200):
+        self.window = int(window)
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            d = self._samples.get(key)
+            if d is None:
+                d = self._samples[key] = deque(maxlen=self.window)
+            d.append(float(seconds))
+
+    def quantile(self, key: str, q: float) -> Optional[float]:
+        """Quantile q của độ trễ đã ghi cho key; None nếu chưa có mẫu."""
+        with self._lock:
+            d = self._samples.get(key)
+            if not d:
+                return None
+            xs = sorted(d)
+        pos = min(len(xs) - 1, max(0, math.ceil(q * len(xs)) - 1))
+        return xs[pos]
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            d = self._samples.get(key)
+            return len(d) if d else 0
+
+
+_tracker = LatencyTracker()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Return the process-wide latency tracker used to pick hedge delays."""
+    return _tracker
+
+
+def _hedge_delay(key: Optional[str]) -> float:
+    s = _settings
+    if key is None or _tracker.count(key) < s["min_samples"]:
+        return s["default_delay"]
+    p = _tracker.quantile(key, s["quantile"])
+    return min(s["max_delay"], max(s["min_delay"], p))
+
+
+def hedged(
+    calls: Sequence[Callable[[], Any]],
+    *,
+    key: Optional[str] = None,
+    delay: Optional[float] = None,
+    valid: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """
+    Chạy calls[0]; sau `delay` giây (mặc định: p95 độ trễ của `key`) chưa có kết quả hợp lệ
+    thì chạy thêm calls[1], ... Trả về kết quả hợp lệ đầu tiên.
+
+    Parameters
+    ----------
+    calls : sequence of callables
+        Nguồn theo thứ tự ưu tiên (nguồn chính trước).
+    key : str, optional
+        Tên dùng để ghi/đọc độ trễ của nguồn chính.
+    delay : float, optional
+        Ngưỡng trễ cố định (giây) thay cho quantile.
+    valid : callable, optional
+        valid(result) -> bool; mặc định mọi kết quả không lỗi đều hợp lệ.
+    """
+    calls = list(calls)
+    if not calls:
+        raise ValueError("calls không được rỗng.")
+    valid = valid or (lambda _r: True)
+
+    if len(calls) == 1 or not _settings["enabled"]:
+        # Tuần tự như cũ (vẫn ghi độ trễ nguồn chính)
+        for i, fn in enumerate(calls):
+            t0 = time.monotonic()
+            try:
+                result = fn()
+            except Exception:
+                if i == len(calls) - 1:
+                    raise
+                continue
+            if valid(result):
+                if i == 0 and key is not None:
+                    _tracker.record(key, time.monotonic() - t0)
+                return result
+            if i == len(calls) - 1:
+                return result
+
+    wait = _hedge_delay(key) if delay is None else float(delay)
+    done: "queue.Queue[tuple]" = queue.Queue()
+
+    def _run(i: int, fn: Callable[[], Any]) -> None:
+        t0 = time.monotonic()
+        try:
+            result = fn()
+            ok = bool(valid(result))
+        except Exception as e:
+            done.put((i, None, e, False))
+            return
+        if ok and i == 0 and key is not None:
+            _tracker.record(key, time.monotonic() - t0)
+        done.put((i, result, None, ok))
+
+    pool = _get_pool()
+    outcomes: Dict[int, tuple] = {}
+    started = 0
+
+    def _launch() -> None:
+        nonlocal started
+        pool.submit(_run, started, calls[started])
+        started += 1
+
+    _launch()
+    while True:
+        timeout = wait if started < len(calls) else None
+        try:
+            i, result, exc, ok = done.get(timeout=timeout)
+        except queue.Empty:
+            _launch()  # nguồn hiện tại chậm -> hedge sang nguồn kế tiếp
+            continue
+        if ok:
+            return result
+        outcomes[i] = (result, exc)
+        if started < len(calls):
+            _launch()  # lỗi/không hợp lệ -> thử nguồn kế tiếp ngay
+        elif len(outcomes) == len(calls):
+            result, exc = outcomes[len(calls) - 1]
+            if exc is not None:
+                raise exc
+            return result
+
+
+def configure_hedging(
+    *,
+    enabled: Optional[bool] = None,
+    quantile: Optional[float] = None,
+    default_delay: Optional[float] = None,
+    min_delay: Optional[float] = None,
+    max_delay: Optional[float] = None,
+) -> None:
+    """
+    Cấu hình hedged requests.
+
+    Ví dụ:
+        configure_hedging(quantile=0.9)     # hedge sớm hơn
+        configure_hedging(enabled=False)    # quay về thử tuần tự
+    """
+    if enabled is not None:
+        _settings["enabled"] = bool(enabled)
+    if quantile is not None:
+        if not 0 < quantile <= 1:
+            raise ValueError("quantile phải trong (0, 1].")
+        _settings["quantile"] = float(quantile)
+    for name, val in (("default_delay", default_delay), ("min_delay", min_delay), ("max_delay", max_delay)):
+        if val is not None:
+            _settings[name] = max(0.0, float(val))
@@ -0,0 +1,214 @@
+"""
+httpcache.py — Cache HTTP trên đĩa cho các endpoint thay đổi chậm (TCBS company/finance).
+
+Áp dụng trong send_request cho GET có URL khớp một rule TTL:
+- còn trong TTL -> trả body từ đĩa, không gửi request
+- hết TTL, có validator (ETag / Last-Modified) -> gửi If-None-Match / If-Modified-Since;
+  304 -> dùng lại body cũ (gần như không tốn băng thông), 200 -> ghi đè
+- hết TTL, không có validator -> tải lại như thường
+
+Mặc định tắt; bật bằng configure_http_cache(enabled=True) hoặc truyền root.
+Mỗi entry là 1 file: dòng đầu là metadata JSON, phần còn lại là body gốc.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+
+from .instrument import get_registry
+
+__all__ = ["HTTPCache", "DEFAULT_TTLS", "get_http_cache", "configure_http_cache"]
+
+_DEFAULT_ROOT = os.path.join("~", ".cache", "xnoapi", "http")
+_RESULTS = {"hits": "hit", "revalidated": "revalidated", "misses": "miss"}
+
+# regex URL -> TTL (giây). Rule đầu tiên khớp được dùng; không khớp -> không cache.
+DEFAULT_TTLS: Tuple[Tuple[str, float], ...] = (
+    (r"/tcanalysis/v1/ticker/[^/]+/(overview|ratios)$", 12 * 3600.0),
+    (r"/tcanalysis/v1/company/[^/]+/(overview|large-share-holders|key-officers|sub-companies)$", 24 * 3600.0),
+    (r"/tcanalysis/v1/finance/[^/]+/(financialratio|incomestatement|balancesheet|cashflow)$", 12 * 3600.0),
+)
+
+
+class HTTPCache:
+    """
+    On-disk HTTP response cache with conditional revalidation.
+
+    Parameters
+    ----------
+    root : str, optional
+        Directory for cache files, by default ~/.cache/xnoapi/http.
+    ttls : sequence of (pattern, seconds), optional
+        URL regex -> freshness TTL; only matching GET URLs are cached,
+        by default DEFAULT_TTLS.
+    enabled : bool, optional
+        By default False.
+    """
+
+    def __init__(self, root: Optional[str] = None, ttls=DEFAULT_TTLS, enabled: bool = False):
+        self.root = os.path.abspath(os.path.expanduser(root or _DEFAULT_ROOT))
+        self.enabled = enabled
+        self.set_ttls(ttls)
+        self._lock = threading.Lock()
+        self.hits = 0  # trả từ đĩa, không request
+        self.revalidated = 0  # 304 Not Modified
+        self.misses = 0  # tải đầy đủ (200)
+
+    def set_ttls(self, ttls) -> None:
+        self._rules = [(re.compile(p), float(s)) for p, s in (ttls.items() if isinstance(ttls, dict) else ttls)]
+
+    def ttl_for(self, url: str) -> Optional[float]:
+        """TTL của url theo rule đầu tiên khớp; None nếu url không được cache."""
+        path = url.split("?", 1)[0]
+        for rx, ttl in self._rules:
+            if rx.search(path):
+                return ttl
+        return None
+
+    # ───────────────────────── Storage ─────────────────────────
+
+    def _path(self, url: str, params: Any) -> str:
+        key = json.dumps([url, params or {}], sort_keys=True, default=str)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], digest)
+
+    @staticmethod
+    def _read(path: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write(path: str, meta: Dict[str, Any], body: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(meta).encode("utf-8") + b"\n")
+                f.write(body)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _response(url: str, meta: Dict[str, Any], body: bytes) -> requests.Response:
+        r = requests.Response()
+        r.status_code = 200
+        r.url = url
+        r._content = body
+        r.encoding = meta.get("encoding")
+        r.headers["Content-Type"] = meta.get("content_type", "")
+        return r
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+        get_registry().observe_cache("http", _RESULTS[name])
+
+    # ───────────────────────── Public API ─────────────────────────
+
+    def fetch(self, url: str, params: Any, send: Callable[[Dict[str, str]], requests.Response]) -> requests.Response:
+        """
+        Trả Response cho GET url/params, dùng cache khi có thể.
+        `send(extra_headers)` thực hiện request thật (extra_headers chứa validator nếu có).
+        """
+        ttl = self.ttl_for(url)
+        if not self.enabled or ttl is None:
+            return send({})
+
+        path = self._path(url, params)
+        cached = self._read(path)
+        extra: Dict[str, str] = {}
+        if cached is not None:
+            meta, body = cached
+            if time.time() - meta.get("stored_at", 0) < ttl:
+                self._count("hits")
+                return self._response(url, meta, body)
+            if meta.get("etag"):
+                extra["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                extra["If-Modified-Since"] = meta["last_modified"]
+
+        r = send(extra)
+        if r.status_code == 304 and cached is not None:
+            meta, body = cached
+            meta["stored_at"] = time.time()
+            self._write(path, meta, body)
+            self._count("revalidated")
+            return self._response(url, meta, body)
+
+        if r.status_code == 200:
+            self._count("misses")
+            meta = {
+                "url": url,
+                "stored_at": time.time(),
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "content_type": r.headers.get("Content-Type", ""),
+                "encoding": r.encoding,
+            }
+            self._write(path, meta, r.content)
+        return r
+
+    def clear(self) -> None:
+        """Xóa toàn bộ file cache."""
+        if not os.path.isdir(self.root):
+            return
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                try:
+                    os.remove(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses}
+
+
+_cache = HTTPCache()
+
+
+def get_http_cache() -> HTTPCache:
+    """Return the process-wide HTTP cache used by send_request()."""
+    return _cache
+
+
+def configure_http_cache(
+    *,
+    enabled: Optional[bool] = None,
+    root: Optional[str] = None,
+    ttls=None,
+) -> None:
+    """
+    Cấu hình cache HTTP trên đĩa.
+
+    Ví dụ:
+        configure_http_cache(enabled=True)                       # ~/.cache/xnoapi/http
+        configure_http_cache(root="/data/xno-http")              # bật + đổi thư mục
+        configure_http_cache(ttls={r"/v1/ticker/[^/]+/ratios$": 3600})
+    """
+    if root is not None:
+        _cache.root = os.path.abspath(os.path.expanduser(root))
+        if enabled is None:
+            enabled = True
+    if ttls is not None:
+        _cache.set_ttls(ttls)
+    if enabled is not None:
+        _cache.enabled = bool(enabled)
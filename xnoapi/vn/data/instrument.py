@@ -0,0 +1,280 @@
+"""
+instrument.py — Đo đạc mọi request ra ngoài của tầng dữ liệu.
+
+Ghi nhận (theo endpoint = host + path đã thay mã/ID bằng ``{}``):
+- histogram độ trễ mỗi lời gọi (tính cả retry), số lần retry
+- số byte nhận/gửi, status code (hoặc tên exception)
+- cache hit/miss (cache trong bộ nhớ, cache HTTP trên đĩa, singleflight, token API key)
+- số trang mỗi lời gọi get_hist
+
+Nguồn dữ liệu: session.request (send_request, _make_request, _fetch_segment_text,
+derivatives.get_hist, ...), aio, Config._probe_api_key (urllib).
+
+Đọc kết quả qua get_registry().snapshot(), listener (callback nhận từng event dạng dict)
+hoặc prometheus_text() (định dạng text exposition của Prometheus).
+
+Chỉ dùng thư viện chuẩn: được import từ utils mà không làm chậm `import xnoapi`.
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+__all__ = [
+    "Registry",
+    "endpoint_name",
+    "get_registry",
+    "configure_instrumentation",
+    "prometheus_text",
+]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PAGE_BUCKETS: Tuple[float, ...] = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+# Đoạn path là mã/ID (HPG, VN30F1M, 12345, uuid, hash...) -> "{}" để không nổ số label
+_ID_SEGMENT = re.compile(r"^(?:\d+|[0-9a-fA-F-]{16,}|(?=[^a-z]*[A-Z])[A-Z0-9._^=-]+)$")
+
+
+def endpoint_name(url: str) -> str:
+    """Tên endpoint của url: host + path, các đoạn là mã/ID được thay bằng ``{}``."""
+    try:
+        parts = urlsplit(url)
+    except ValueError:  # URL hỏng (vd. "http://[bad"): không để đo đạc làm hỏng request
+        return url.split("?", 1)[0]
+    path = "/".join("{}" if _ID_SEGMENT.match(s) else s for s in parts.path.split("/"))
+    return parts.netloc + path
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # ô cuối: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        out, acc = [], 0
+        for bound, n in zip(self.bounds + (float("inf"),), self.counts):
+            acc += n
+            out.append(("+Inf" if bound == float("inf") else repr(float(bound)), acc))
+        return out
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"buckets": dict(self.cumulative()), "sum": self.sum, "count": self.count}
+
+
+class Registry:
+    """
+    Thread-safe in-process metrics registry for outbound calls.
+
+    Parameters
+    ----------
+    buckets : sequence of float, optional
+        Latency histogram bounds in seconds, by default DEFAULT_BUCKETS.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.enabled = True
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self.endpoint: Callable[[str], str] = endpoint_name
+        self._lock = threading.Lock()
+        self._listeners: Tuple[Callable[[Dict[str, Any]], None], ...] = ()
+        self.reset()
+
+    def reset(self) -> None:
+        """Xóa mọi số liệu đã ghi (giữ listener và cấu hình)."""
+        with self._lock:
+            self._latency: Dict[Tuple[str, str], _Histogram] = {}
+            self._requests: Dict[Tuple[str, str, str], int] = {}
+            self._retries: Dict[Tuple[str, str], int] = {}
+            self._bytes_in: Dict[Tuple[str, str], int] = {}
+            self._bytes_out: Dict[Tuple[str, str], int] = {}
+            self._cache: Dict[Tuple[str, str], int] = {}
+            self._pages: Dict[str, _Histogram] = {}
+
+    # ───────────────────────── Listeners ─────────────────────────
+
+    def add_listener(self, fn: Callable[[Dict[str, Any]], None]) -> None:
+        """fn(event) được gọi đồng bộ với mỗi event (dict có khóa "type")."""
+        with self._lock:
+            self._listeners = self._listeners + (fn,)
+
+    def remove_listener(self, fn: Callable[[Dict[str, Any]], None]) -> None:
+        with self._lock:
+            self._listeners = tuple(f for f in self._listeners if f is not fn)
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        for fn in self._listeners:
+            try:
+                fn(event)
+            except Exception:
+                pass  # listener lỗi không được làm hỏng request
+
+    # ───────────────────────── Recording ─────────────────────────
+
+    def observe_request(
+        self,
+        method: str,
+        url: str,
+        *,
+        status: Any,
+        seconds: float,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+        retries: int = 0,
+    ) -> None:
+        """Ghi một lời gọi ra ngoài; status là HTTP status hoặc tên exception."""
+        if not self.enabled:
+            return
+        ep, method = self.endpoint(url), method.upper()
+        key = (ep, method)
+        with self._lock:
+            h = self._latency.get(key)
+            if h is None:
+                h = self._latency[key] = _Histogram(self.buckets)
+            h.observe(seconds)
+            skey = (ep, method, str(status))
+            self._requests[skey] = self._requests.get(skey, 0) + 1
+            self._retries[key] = self._retries.get(key, 0) + int(retries)
+            self._bytes_in[key] = self._bytes_in.get(key, 0) + int(bytes_in)
+            self._bytes_out[key] = self._bytes_out.get(key, 0) + int(bytes_out)
+        if self._listeners:
+            self._emit({
+                "type": "request", "endpoint": ep, "method": method, "url": url, "status": status,
+                "seconds": seconds, "bytes_in": bytes_in, "bytes_out": bytes_out, "retries": retries,
+            })
+
+    def observe_cache(self, cache: str, result: str) -> None:
+        """Ghi một lần tra cache; result: "hit" | "miss" | "revalidated" | ..."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._cache[(cache, result)] = self._cache.get((cache, result), 0) + 1
+        if self._listeners:
+            self._emit({"type": "cache", "cache": cache, "result": result})
+
+    def observe_pages(self, operation: str, pages: int) -> None:
+        """Ghi số trang (request phân trang) của một lời gọi như stocks.get_hist."""
+        if not self.enabled:
+            return
+        with self._lock:
+            h = self._pages.get(operation)
+            if h is None:
+                h = self._pages[operation] = _Histogram(PAGE_BUCKETS)
+            h.observe(pages)
+        if self._listeners:
+            self._emit({"type": "pages", "operation": operation, "pages": pages})
+
+    # ───────────────────────── Export ─────────────────────────
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Bản chụp số liệu dạng dict (dùng cho log/JSON)."""
+        with self._lock:
+            endpoints: Dict[str, Dict[str, Any]] = {}
+            for (ep, method), h in self._latency.items():
+                name = f"{method} {ep}"
+                endpoints[name] = {
+                    "latency": h.as_dict(),
+                    "retries": self._retries.get((ep, method), 0),
+                    "bytes_in": self._bytes_in.get((ep, method), 0),
+                    "bytes_out": self._bytes_out.get((ep, method), 0),
+                    "status": {},
+                }
+            for (ep, method, status), n in self._requests.items():
+                endpoints[f"{method} {ep}"]["status"][status] = n
+            cache: Dict[str, Dict[str, int]] = {}
+            for (name, result), n in self._cache.items():
+                cache.setdefault(name, {})[result] = n
+            pages = {op: h.as_dict() for op, h in self._pages.items()}
+        return {"endpoints": endpoints, "cache": cache, "pages": pages}
+
+    def prometheus(self, prefix: str = "xnoapi") -> str:
+        """Số liệu theo định dạng text exposition của Prometheus."""
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_: str) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        def hist(name: str, labels: Dict[str, str], h: _Histogram) -> None:
+            for le, n in h.cumulative():
+                lines.append(f"{prefix}_{name}_bucket{_labels({**labels, 'le': le})} {n}")
+            lines.append(f"{prefix}_{name}_sum{_labels(labels)} {h.sum!r}")
+            lines.append(f"{prefix}_{name}_count{_labels(labels)} {h.count}")
+
+        def counter(name: str, help_: str, data: Dict[tuple, int], names: Sequence[str]) -> None:
+            header(name, "counter", help_)
+            for key, n in sorted(data.items()):
+                lines.append(f"{prefix}_{name}{_labels(dict(zip(names, key)))} {n}")
+
+        with self._lock:
+            header("request_duration_seconds", "histogram", "Outbound call latency including retries.")
+            for (ep, method), h in sorted(self._latency.items()):
+                hist("request_duration_seconds", {"endpoint": ep, "method": method}, h)
+            counter("requests_total", "Outbound calls by final status.", self._requests, ("endpoint", "method", "status"))
+            counter("request_retries_total", "Retries performed.", self._retries, ("endpoint", "method"))
+            counter("response_bytes_total", "Bytes received.", self._bytes_in, ("endpoint", "method"))
+            counter("request_bytes_total", "Bytes sent in request bodies.", self._bytes_out, ("endpoint", "method"))
+            counter("cache_events_total", "Cache lookups by result.", self._cache, ("cache", "result"))
+            header("pages_per_call", "histogram", "Paginated requests per call.")
+            for op, h in sorted(self._pages.items()):
+                hist("pages_per_call", {"operation": op}, h)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+_registry = Registry()
+
+
+def get_registry() -> Registry:
+    """Return the process-wide metrics registry."""
+    return _registry
+
+
+def configure_instrumentation(
+    *,
+    enabled: Optional[bool] = None,
+    buckets: Optional[Sequence[float]] = None,
+    endpoint: Optional[Callable[[str], str]] = None,
+    reset: bool = False,
+) -> None:
+    """
+    Cấu hình đo đạc (mặc định bật).
+
+    Ví dụ:
+        configure_instrumentation(enabled=False)                   # tắt hẳn
+        configure_instrumentation(buckets=(0.1, 0.5, 1, 5), reset=True)
+        get_registry().add_listener(lambda ev: print(ev))          # nhận từng event
+    """
+    if enabled is not None:
+        _registry.enabled = bool(enabled)
+    if endpoint is not None:
+        _registry.endpoint = endpoint
+    if buckets is not None:
+        _registry.buckets = tuple(sorted(float(b) for b in buckets))
+        reset = True  # histogram cũ có bucket khác
+    if reset:
+        _registry.reset()
+
+
+def prometheus_text(prefix: str = "xnoapi") -> str:
+    """get_registry().prometheus(prefix)."""
+    return _registry.prometheus(prefix)
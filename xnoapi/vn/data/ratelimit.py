@@ -0,0 +1,184 @@
+"""
+ratelimit.py — Giới hạn tốc độ request dùng chung toàn process, theo từng host.
+
+Mỗi host (api-v2.xno.vn, apipubaws.tcbs.com.vn, trading.vietcap.com.vn, fmarket,
+msn/yahoo, ...) có một token bucket riêng. Bucket tự điều chỉnh kiểu AIMD:
+- gặp 429/503 -> giảm rate một nửa (có cooldown để một loạt lỗi không kéo rate về sàn)
+- request thành công -> tăng dần lại tới rate tối đa đã cấu hình
+
+Mọi request trong session.request() đều đi qua limiter này.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+__all__ = ["TokenBucket", "RateLimiter", "get_rate_limiter", "configure_rate_limit"]
+
+THROTTLE_STATUSES = frozenset({429, 503})
+
+# host (hoặc hậu tố domain) -> (requests/giây, burst)
+DEFAULT_HOST_LIMITS: Dict[str, Tuple[float, int]] = {
+    "api-v2.xno.vn": (20.0, 40),
+    "apipubaws.tcbs.com.vn": (10.0, 20),
+    "trading.vietcap.com.vn": (10.0, 20),
+    "api.fmarket.vn": (5.0, 10),
+    "msn.com": (5.0, 10),
+    "finance.yahoo.com": (5.0, 10),
+}
+DEFAULT_LIMIT: Tuple[float, int] = (10.0, 20)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with adaptive (AIMD) rate.
+
+    Parameters
+    ----------
+    rate : float
+        Max sustained requests per second.
+    burst : int
+        Bucket capacity (requests allowed back-to-back).
+    min_rate : float, optional
+        Floor for the adaptive rate, by default rate / 16.
+    cooldown : float, optional
+        Seconds between two consecutive rate cuts, by default 1.0.
+    """
+
+    def __init__(self, rate: float, burst: int, *, min_rate: Optional[float] = None, cooldown: float = 1.0):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate phải > 0 và burst phải >= 1.")
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = float(min_rate) if min_rate else max(self.max_rate / 16.0, 0.1)
+        self.burst = int(burst)
+        self.cooldown = float(cooldown)
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._last_cut = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def reserve(self) -> float:
+        """Lấy 1 token; trả về số giây cần chờ trước khi gửi (0 nếu gửi ngay được)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Blocking: chờ tới khi được phép gửi request."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_throttle(self) -> None:
+        """Upstream báo quá tải (429/503): giảm rate một nửa."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_cut < self.cooldown:
+                return
+            self._refill(now)
+            self._last_cut = now
+            self.rate = max(self.min_rate, self.rate / 2.0)
+            self._tokens = min(self._tokens, 0.0)
+
+    def on_success(self) -> None:
+        """Request thành công: tăng rate dần (~ +1 req/s mỗi giây) về max_rate."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + 1.0 / max(self.rate, 1.0))
+
+
+class RateLimiter:
+    """Registry of per-host token buckets."""
+
+    def __init__(self, host_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 default: Tuple[float, int] = DEFAULT_LIMIT):
+        self.enabled = True
+        self._limits = dict(DEFAULT_HOST_LIMITS if host_limits is None else host_limits)
+        self._default = default
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, host: str) -> str:
+        """Host cụ thể nhất có cấu hình (khớp chính xác hoặc theo hậu tố domain)."""
+        host = host.lower()
+        best = ""
+        for h in self._limits:
+            if (host == h or host.endswith("." + h)) and len(h) > len(best):
+                best = h
+        return best or host
+
+    def bucket(self, url_or_host: str) -> TokenBucket:
+        host = urlsplit(url_or_host).hostname if "://" in url_or_host else url_or_host
+        key = self._key(host or "")
+        with self._lock:
+            b = self._buckets.get(key)
+            if b is None:
+                rate, burst = self._limits.get(key, self._default)
+                b = self._buckets[key] = TokenBucket(rate, burst)
+            return b
+
+    def configure(self, host: str, rate: float, burst: Optional[int] = None) -> None:
+        """Đặt budget cho 1 host (áp dụng ngay, reset trạng thái adaptive của host đó)."""
+        host = host.lower()
+        with self._lock:
+            self._limits[host] = (float(rate), int(burst if burst is not None else max(1, round(rate * 2))))
+            # Bucket của host khác có thể đang khớp theo hậu tố -> tạo lại toàn bộ
+            self._buckets.clear()
+
+    def reserve(self, url: str) -> float:
+        """Số giây cần chờ trước khi gửi request tới url (dùng được cho cả sync lẫn async)."""
+        if not self.enabled:
+            return 0.0
+        return self.bucket(url).reserve()
+
+    def acquire(self, url: str) -> None:
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    def feedback(self, url: str, status: Optional[int]) -> None:
+        """Báo kết quả request để bucket tự điều chỉnh rate."""
+        if not self.enabled or status is None:
+            return
+        if status in THROTTLE_STATUSES:
+            self.bucket(url).on_throttle()
+        elif status < 400:
+            self.bucket(url).on_success()
+
+
+_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter."""
+    return _limiter
+
+
+def configure_rate_limit(host: Optional[str] = None, rate: Optional[float] = None,
+                         burst: Optional[int] = None, *, enabled: Optional[bool] = None) -> None:
+    """
+    Cấu hình limiter dùng chung.
+
+    Ví dụ:
+        configure_rate_limit("api-v2.xno.vn", rate=50, burst=100)
+        configure_rate_limit(enabled=False)   # tắt hẳn
+    """
+    if enabled is not None:
+        _limiter.enabled = bool(enabled)
+    if host is not None:
+        if rate is None:
+            raise ValueError("Cần truyền rate khi cấu hình host.")
+        _limiter.configure(host, rate, burst)
@@ -0,0 +1,498 @@
+"""
+replay.py — Ghi/phát lại response HTTP để đo hiệu năng tầng dữ liệu không cần mạng.
+
+- Recorder: ghi mọi response đi qua session.request (send_request, _make_request,
+  _fetch_segment_text, derivatives.get_hist, ...) thành fixture trên đĩa.
+- ReplayServer: HTTP server cục bộ phát lại fixture, có thể cấu hình độ trễ, kích thước
+  trang OHLCV và tỉ lệ lỗi (429/503/...) để thử retry/rate limit.
+- redirect(): trỏ Config.get_link/get_link_data và mọi URL module (TCBS, VietCap,
+  fmarket, MSN/Yahoo, XNO) về server, dạng ``{base}/{scheme}/{host}/{path}``.
+
+Ví dụ:
+    with Recorder("fixtures"):
+        get_hist("HPG", "m")                       # gọi thật, ghi fixture
+
+    with ReplayServer("fixtures", latency=0.05, page_size=200) as srv, srv.redirect():
+        get_hist("HPG", "m")                       # phát lại, không ra mạng
+
+Mỗi fixture là 1 file: dòng đầu là metadata JSON, phần còn lại là body (đã giải nén).
+Khóa fixture = method + URL gốc (query đã sắp xếp) + body request; header (API key) không
+được lưu.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import requests
+
+from . import session as _http
+from .utils import Config
+
+__all__ = ["FixtureStore", "Recorder", "ReplayServer", "fixture_key", "redirect"]
+
+# Header của response được giữ lại khi ghi (body lưu đã giải nén nên bỏ Content-Encoding/Length)
+_KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control", "Retry-After")
+_OHLCV_MARK = "/ohlcv/"
+_OHLCV_PAGE = 500  # số bar mỗi trang của API thật
+_OHLCV_STEP = {"m": 60, "h": 3600, "D": 86400}
+
+
+def _body_key(body: Any) -> Optional[str]:
+    if not body:
+        return None
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    try:
+        return json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+    except (ValueError, UnicodeDecodeError):
+        return hashlib.sha1(body).hexdigest()
+
+
+def fixture_key(method: str, url: str, body: Any = None) -> str:
+    """Khóa fixture của request (URL đầy đủ kèm query; thứ tự tham số không quan trọng)."""
+    parts = urlsplit(url)
+    query = sorted(parse_qsl(parts.query, keep_blank_values=True))
+    ident = json.dumps([method.upper(), parts.netloc + parts.path, query, _body_key(body)])
+    return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+
+def _prepare(method: str, url: str, kwargs: Dict[str, Any]) -> Tuple[str, Any]:
+    """(URL kèm query, body) đúng như requests gửi đi cho url/kwargs."""
+    p = requests.PreparedRequest()
+    p.prepare(
+        method=method,
+        url=url,
+        params=kwargs.get("params"),
+        data=kwargs.get("data"),
+        json=kwargs.get("json"),
+    )
+    return p.url, p.body
+
+
+class FixtureStore:
+    """
+    Directory of recorded responses, one file per request key.
+
+    Parameters
+    ----------
+    root : str
+        Directory holding ``<key>.fx`` files.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(os.path.expanduser(root))
+
+    def __repr__(self) -> str:
+        return f"FixtureStore(root={self.root!r})"
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._files())
+
+    def _files(self) -> Iterator[str]:
+        if not os.path.isdir(self.root):
+            return
+        for name in sorted(os.listdir(self.root)):
+            if name.endswith(".fx"):
+                yield os.path.join(self.root, name)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.fx")
+
+    @staticmethod
+    def _read(path: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def load(self, key: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """(meta, body) của fixture; None nếu chưa ghi."""
+        return self._read(self.path(key))
+
+    def entries(self) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+        """Duyệt mọi fixture đã ghi."""
+        for path in self._files():
+            item = self._read(path)
+            if item is not None:
+                yield item
+
+    def save(
+        self,
+        method: str,
+        url: str,
+        body: Any,
+        *,
+        status: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        content: bytes = b"",
+    ) -> str:
+        """Ghi (nguyên tử) response cho request method/url/body; trả về khóa fixture."""
+        key = fixture_key(method, url, body)
+        meta = {
+            "method": method.upper(),
+            "url": url,
+            "status": int(status),
+            "headers": dict(headers or {}),
+            "recorded_at": time.time(),
+        }
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(meta).encode("utf-8") + b"\n")
+                f.write(content)
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        return key
+
+
+def _as_store(store: "FixtureStore | str") -> FixtureStore:
+    if isinstance(store, FixtureStore):
+        return store
+    if isinstance(store, (str, os.PathLike)):
+        return FixtureStore(os.fspath(store))
+    raise TypeError(f"store phải là FixtureStore hoặc đường dẫn, nhận {type(store)}")
+
+
+# ───────────────────────── Recorder ─────────────────────────
+
+class Recorder:
+    """
+    Record every response passing through the shared session into a FixtureStore.
+
+    Dùng như context manager (hoặc start()/stop()). Response cuối cùng (sau retry) của
+    mỗi request được ghi; request trùng khóa ghi đè bản cũ.
+    """
+
+    def __init__(self, store: "FixtureStore | str"):
+        self.store = _as_store(store)
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def _hook(self, method: str, url: str, kwargs: Dict[str, Any], resp: requests.Response) -> None:
+        full_url, body = _prepare(method, url, kwargs)
+        headers = {h: resp.headers[h] for h in _KEEP_HEADERS if h in resp.headers}
+        self.store.save(method, full_url, body, status=resp.status_code, headers=headers, content=resp.content)
+        with self._lock:
+            self.recorded += 1
+
+    def start(self) -> "Recorder":
+        _http.add_response_hook(self._hook)
+        return self
+
+    def stop(self) -> None:
+        _http.remove_response_hook(self._hook)
+
+    def __enter__(self) -> "Recorder":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# ───────────────────────── Redirect ─────────────────────────
+
+@contextlib.contextmanager
+def redirect(base_url: str, hosts: Optional[Iterable[str]] = None):
+    """
+    Trỏ mọi request (session dùng chung, aio, Config.get_link/get_link_data) về
+    ``{base_url}/{scheme}/{host}/{path}`` (giữ scheme để khóa fixture khớp cả URL http://).
+    `hosts` giới hạn các host bị đổi (mặc định: tất cả).
+    Rate limit/circuit breaker vẫn tính theo host gốc.
+    """
+    base = base_url.rstrip("/")
+    allowed = {h.lower() for h in hosts} if hosts is not None else None
+
+    def _rewrite(url: str) -> str:
+        if url.startswith(base):
+            return url
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or (allowed is not None and parts.hostname not in allowed):
+            return url
+        return f"{base}/{parts.scheme}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+    old_links = (Config._link, Config._link_data)
+    link, link_data = Config.get_link(), Config.get_link_data()
+    old = _http.set_url_rewriter(_rewrite)
+    Config._link, Config._link_data = _rewrite(link), _rewrite(link_data)
+    try:
+        yield _rewrite
+    finally:
+        _http.set_url_rewriter(old)
+        Config._link, Config._link_data = old_links
+
+
+# ───────────────────────── Stand-in server ─────────────────────────
+
+def _ohlcv_arrays(body: bytes) -> Optional[Dict[str, np.ndarray]]:
+    """Body {t,o,h,l,c,(v)} (có thể bọc trong "data") -> mảng; None nếu không đúng dạng."""
+    try:
+        parsed = json.loads(body)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if isinstance(parsed, dict) and isinstance(parsed.get("data"), dict):
+        parsed = parsed["data"]
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("t"), list):
+        return None
+    n = len(parsed["t"])
+    try:
+        cols = {"t": np.asarray(parsed["t"], dtype=np.int64)}
+        for k in ("o", "h", "l", "c", "v"):
+            v = parsed.get(k)
+            cols[k] = np.asarray(v, dtype=np.float64) if isinstance(v, list) and len(v) == n else np.full(n, np.nan)
+    except (TypeError, ValueError):
+        return None
+    return cols
+
+
+def _merge_series(a: Optional[Dict[str, np.ndarray]], b: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    cols = b if a is None else {k: np.concatenate([a[k], b[k]]) for k in b}
+    _, idx = np.unique(cols["t"], return_index=True)  # sắp theo t, bỏ bar trùng
+    return {k: v[idx] for k, v in cols.items()}
+
+
+class ReplayServer:
+    """
+    Local HTTP stand-in that replays recorded fixtures.
+
+    Parameters
+    ----------
+    store : FixtureStore | str, optional
+        Recorded fixtures. Endpoint OHLCV (``.../ohlcv/{res}``) được gộp thành chuỗi liên tục
+        và phục vụ lại theo ``from``/``to`` với kích thước trang ``page_size``.
+    host, port : str, int
+        Địa chỉ lắng nghe; port=0 để hệ điều hành chọn.
+    latency : float
+        Độ trễ cố định (giây) trước mỗi response.
+    jitter : float
+        Độ trễ ngẫu nhiên thêm, phân phối đều trong [0, jitter].
+    page_size : int, optional
+        Số bar mỗi trang OHLCV, mặc định 500 như API thật.
+    error_rate : float
+        Xác suất trả `error_status` thay cho response thật.
+    error_status : int
+        Status của lỗi được tiêm, mặc định 503.
+    retry_after : float, optional
+        Giá trị header Retry-After (giây) kèm lỗi được tiêm.
+    seed : int, optional
+        Seed cho độ trễ/lỗi ngẫu nhiên (đo lặp lại được).
+
+    Các tham số độ trễ/lỗi/trang là thuộc tính, có thể đổi khi server đang chạy.
+    """
+
+    def __init__(
+        self,
+        store: "FixtureStore | str | None" = None,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        page_size: Optional[int] = None,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        retry_after: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        self.store = _as_store(store) if store is not None else None
+        self.host = host
+        self.port = int(port)
+        self.latency = float(latency)
+        self.jitter = float(jitter)
+        self.page_size = page_size
+        self.error_rate = float(error_rate)
+        self.error_status = int(error_status)
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._series: Dict[str, Dict[str, np.ndarray]] = {}
+        self._stats = {"requests": 0, "hits": 0, "pages": 0, "not_modified": 0, "misses": 0, "errors": 0}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        if self.store is not None:
+            for meta, body in self.store.entries():
+                self._absorb(meta, body)
+
+    def __repr__(self) -> str:
+        return f"ReplayServer(url={self.url!r}, store={self.store!r})"
+
+    # ───────────────────────── Data ─────────────────────────
+
+    def _absorb(self, meta: Dict[str, Any], body: bytes) -> None:
+        if meta.get("status") != 200 or _OHLCV_MARK not in meta.get("url", ""):
+            return
+        cols = _ohlcv_arrays(body)
+        if cols is not None and len(cols["t"]):
+            parts = urlsplit(meta["url"])
+            self.add_series(parts.netloc + parts.path, cols)
+
+    def add_series(self, path: str, cols: Dict[str, np.ndarray]) -> None:
+        """Gộp các bar {t (epoch giây), o, h, l, c, v} vào chuỗi OHLCV của `path` ("host/path")."""
+        cols = {k: np.asarray(v) for k, v in cols.items()}
+        with self._lock:
+            self._series[path] = _merge_series(self._series.get(path), cols)
+
+    def add_ohlcv(
+        self,
+        symbol: str,
+        resolution: str = "m",
+        bars: int = 10_000,
+        *,
+        start: int = 1_600_000_000,
+        seed: int = 0,
+    ) -> None:
+        """Sinh `bars` bar giả (random walk) cho get_hist(symbol, resolution)."""
+        from .stocks import _STOCKS_API_BASE
+
+        rng = np.random.default_rng(seed)
+        step = _OHLCV_STEP.get(resolution, 60)
+        c = 20.0 * np.exp(np.cumsum(rng.normal(0.0, 1e-3, bars)))
+        o = np.concatenate([[c[0]], c[:-1]])
+        spread = np.abs(rng.normal(0.0, 5e-4, bars)) * c
+        parts = urlsplit(f"{_STOCKS_API_BASE}/{symbol}/ohlcv/{resolution}")
+        self.add_series(
+            parts.netloc + parts.path,
+            {
+                "t": start + step * np.arange(bars, dtype=np.int64),
+                "o": np.round(o, 2),
+                "h": np.round(np.maximum(o, c) + spread, 2),
+                "l": np.round(np.minimum(o, c) - spread, 2),
+                "c": np.round(c, 2),
+                "v": rng.integers(100, 100_000, bars).astype(np.float64),
+            },
+        )
+
+    def _page(self, path: str, query: Dict[str, str]) -> Optional[bytes]:
+        cols = self._series.get(path)
+        if cols is None:
+            return None
+        t = cols["t"]
+        lo = np.searchsorted(t, int(query.get("from", 0)), "left")
+        hi = np.searchsorted(t, int(query.get("to", 9_999_999_999)), "right")
+        hi = min(hi, lo + int(self.page_size or _OHLCV_PAGE))
+        page = {k: v[lo:hi].tolist() for k, v in cols.items()}
+        return json.dumps(page).encode("utf-8")
+
+    # ───────────────────────── Serving ─────────────────────────
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """requests, hits (fixture), pages (OHLCV), not_modified, misses (404), errors (tiêm lỗi)."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        self._count("requests")
+        with self._lock:
+            delay = self.latency + (self._rng.uniform(0.0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else None
+        if fail:
+            self._count("errors")
+            extra = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+            return _send(handler, self.error_status, b'{"error":"injected"}', extra)
+
+        scheme, _, rest = handler.path.lstrip("/").partition("/")  # {base}/{scheme}/{host}/{path}
+        url = f"{scheme}://{rest}"  # URL gốc
+        parts = urlsplit(url)
+        if handler.command == "GET" and _OHLCV_MARK in parts.path:
+            page = self._page(parts.netloc + parts.path, dict(parse_qsl(parts.query)))
+            if page is not None:
+                self._count("pages")
+                return _send(handler, 200, page, {"Content-Type": "application/json"})
+
+        item = self.store.load(fixture_key(handler.command, url, body)) if self.store is not None else None
+        if item is None:
+            self._count("misses")
+            msg = json.dumps({"error": "no fixture", "method": handler.command, "url": url})
+            return _send(handler, 404, msg.encode("utf-8"), {"Content-Type": "application/json"})
+
+        meta, content = item
+        headers = meta.get("headers", {})
+        etag = headers.get("ETag")
+        if etag and handler.headers.get("If-None-Match") == etag:
+            self._count("not_modified")
+            return _send(handler, 304, b"", {"ETag": etag})
+        self._count("hits")
+        _send(handler, int(meta.get("status", 200)), content, headers)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "ReplayServer":
+        if self._server is not None:
+            return self
+        owner = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive như upstream
+            disable_nagle_algorithm = True  # header/body ghi riêng: tránh trễ ~40ms do delayed ACK
+
+            def do_GET(self):
+                owner._handle(self)
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="xnoapi-replay")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    def redirect(self, hosts: Optional[Iterable[str]] = None):
+        """redirect(self.url, hosts): context manager trỏ request về server này."""
+        return redirect(self.url, hosts)
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _send(handler: BaseHTTPRequestHandler, status: int, body: bytes, headers: Dict[str, str]) -> None:
+    handler.send_response(status)
+    for name, value in headers.items():
+        if name.lower() not in ("content-length", "transfer-encoding", "content-encoding", "connection"):
+            handler.send_header(name, value)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    if body and handler.command != "HEAD":
+        handler.wfile.write(body)
@@ -0,0 +1,227 @@
+"""
+retry.py — Chính sách retry + circuit breaker dùng chung cho mọi endpoint.
+
+- Retry chỉ với lỗi mạng/timeout và các status có thể thành công nếu thử lại
+  (408, 425, 429, 500, 502, 503, 504). 4xx khác trả về ngay.
+- Backoff lũy thừa có jitter; tôn trọng header Retry-After.
+- Circuit breaker theo host: sau `failure_threshold` lời gọi thất bại liên tiếp (mỗi lời
+  gọi tính 1 lần, dù đã retry bao nhiêu lượt), mở mạch trong `reset_timeout` giây -> các
+  request tới host đó fail-fast (CircuitOpenError) thay vì chờ hết timeout; hết thời gian
+  thì cho 1 lời gọi thử (half-open). Lời gọi bị hủy (CancelledError, KeyboardInterrupt)
+  không tính là lỗi.
+"""
+
+from __future__ import annotations
+
+import email.utils
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+__all__ = [
+    "RETRYABLE_STATUSES",
+    "CircuitOpenError",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "get_retry_policy",
+    "get_circuit_breaker",
+    "configure_retry",
+    "parse_retry_after",
+]
+
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised when the circuit for a host is open (upstream considered down)."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse header Retry-After (số giây hoặc HTTP-date) -> số giây; None nếu không hợp lệ."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """
+    Retry policy with jittered exponential backoff.
+
+    Parameters
+    ----------
+    retries : int, optional
+        Number of retries after the first attempt, by default 2.
+    backoff : tuple of float, optional
+        (low, high) range of the first delay in seconds; attempt k waits
+        uniform(low, high) * 2**k, by default (0.6, 1.2).
+    max_delay : float, optional
+        Upper bound for a single wait; a Retry-After above it is not honored
+        and the response is returned as-is, by default 30.
+    statuses : iterable of int, optional
+        HTTP statuses worth retrying, by default RETRYABLE_STATUSES.
+    """
+
+    def __init__(
+        self,
+        retries: int = 2,
+        backoff: Tuple[float, float] = (0.6, 1.2),
+        max_delay: float = 30.0,
+        statuses=RETRYABLE_STATUSES,
+    ):
+        self.retries = max(0, int(retries))
+        self.backoff = (float(backoff[0]), float(backoff[1]))
+        self.max_delay = float(max_delay)
+        self.statuses = frozenset(statuses)
+
+    def __repr__(self) -> str:
+        return f"RetryPolicy(retries={self.retries}, backoff={self.backoff}, max_delay={self.max_delay})"
+
+    def is_retryable_status(self, status: int) -> bool:
+        return status in self.statuses
+
+    @staticmethod
+    def is_retryable_exception(exc: BaseException) -> bool:
+        return isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)) and not isinstance(
+            exc, CircuitOpenError
+        )
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Số giây chờ trước lần thử `attempt+1`; None nếu Retry-After vượt max_delay (không nên retry)."""
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        lo, hi = self.backoff
+        return min(self.max_delay, random.uniform(lo, hi) * (2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker (closed -> open -> half-open).
+
+    Parameters
+    ----------
+    failure_threshold : int, optional
+        Consecutive failed calls that open the circuit, by default 5. A call counts
+        once however many retry attempts it made.
+    reset_timeout : float, optional
+        Seconds the circuit stays open before a trial request, by default 30.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self.enabled = True
+        self._state: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlsplit(url).hostname or url).lower()
+
+    def _get(self, host: str) -> dict:
+        st = self._state.get(host)
+        if st is None:
+            st = self._state[host] = {"failures": 0, "opened_at": None, "trial": False}
+        return st
+
+    def before_call(self, url: str) -> None:
+        """Raise CircuitOpenError nếu mạch của host đang mở."""
+        if not self.enabled:
+            return
+        host = self._host(url)
+        with self._lock:
+            st = self._get(host)
+            if st["opened_at"] is None:
+                return
+            waited = time.monotonic() - st["opened_at"]
+            if waited >= self.reset_timeout and not st["trial"]:
+                st["trial"] = True  # half-open: cho đúng 1 request thử
+                return
+            remaining = max(0.0, self.reset_timeout - waited)
+        raise CircuitOpenError(f"Circuit open for {host}; retry in {remaining:.1f}s")
+
+    def release(self, url: str) -> None:
+        """Trả lượt thử half-open mà không ghi kết quả (lời gọi bị hủy giữa chừng)."""
+        with self._lock:
+            st = self._state.get(self._host(url))
+            if st is not None:
+                st["trial"] = False
+
+    def record_success(self, url: str) -> None:
+        with self._lock:
+            st = self._get(self._host(url))
+            st.update(failures=0, opened_at=None, trial=False)
+
+    def record_failure(self, url: str) -> None:
+        with self._lock:
+            st = self._get(self._host(url))
+            st["failures"] += 1
+            if st["trial"] or st["failures"] >= self.failure_threshold:
+                st.update(opened_at=time.monotonic(), trial=False)
+
+    def state(self, url: str) -> str:
+        """'closed' | 'open' | 'half-open' cho host của url."""
+        with self._lock:
+            st = self._get(self._host(url))
+            if st["opened_at"] is None:
+                return "closed"
+            if st["trial"] or time.monotonic() - st["opened_at"] >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state.clear()
+
+
+_policy = RetryPolicy()
+_breaker = CircuitBreaker()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Return the default retry policy used by session.request()."""
+    return _policy
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Return the process-wide circuit breaker."""
+    return _breaker
+
+
+def configure_retry(
+    *,
+    retries: Optional[int] = None,
+    backoff: Optional[Tuple[float, float]] = None,
+    max_delay: Optional[float] = None,
+    failure_threshold: Optional[int] = None,
+    reset_timeout: Optional[float] = None,
+    circuit_breaker: Optional[bool] = None,
+) -> None:
+    """Chỉnh retry policy mặc định và circuit breaker dùng chung."""
+    global _policy
+    _policy = RetryPolicy(
+        retries=_policy.retries if retries is None else retries,
+        backoff=_policy.backoff if backoff is None else backoff,
+        max_delay=_policy.max_delay if max_delay is None else max_delay,
+        statuses=_policy.statuses,
+    )
+    if failure_threshold is not None:
+        _breaker.failure_threshold = max(1, int(failure_threshold))
+    if reset_timeout is not None:
+        _breaker.reset_timeout = float(reset_timeout)
+    if circuit_breaker is not None:
+        _breaker.enabled = bool(circuit_breaker)
@@ -0,0 +1,233 @@
+"""
+session.py — Lớp HTTP dùng chung cho mọi endpoint dữ liệu.
+
+Tất cả request (send_request, _make_request, _fetch_segment_text, list_liquid_asset,
+derivatives.get_hist) đi qua một `requests.Session` duy nhất:
+- keep-alive: tái sử dụng kết nối TCP/TLS giữa các lần gọi
+- connection pool theo host (có thể cấu hình riêng từng host)
+- tự động gzip/deflate
+- thread-safe: các downloader song song dùng chung pool
+- rate limit theo host (xem ratelimit.py) trước mỗi request
+- retry/backoff + circuit breaker dùng chung (xem retry.py)
+- hook đổi URL đích / quan sát response (dùng bởi replay.py để ghi & phát lại offline)
+- đo độ trễ/byte/retry/status theo endpoint (xem instrument.py)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .instrument import get_registry
+from .ratelimit import get_rate_limiter
+from .retry import CircuitOpenError, RetryPolicy, get_circuit_breaker, get_retry_policy, parse_retry_after
+
+__all__ = [
+    "configure_session",
+    "get_session",
+    "close_session",
+    "request",
+    "set_url_rewriter",
+    "rewrite_url",
+    "add_response_hook",
+    "remove_response_hook",
+]
+
+_DEFAULT_POOL_CONNECTIONS = 10  # số host giữ pool
+_DEFAULT_POOL_MAXSIZE = 32  # số kết nối tối đa mỗi host
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_settings: Dict[str, object] = {
+    "pool_connections": _DEFAULT_POOL_CONNECTIONS,
+    "pool_maxsize": _DEFAULT_POOL_MAXSIZE,
+    "host_pool_sizes": {},
+}
+
+
+def _build_session() -> requests.Session:
+    s = requests.Session()
+    default = HTTPAdapter(
+        pool_connections=int(_settings["pool_connections"]),
+        pool_maxsize=int(_settings["pool_maxsize"]),
+        pool_block=False,
+    )
+    s.mount("https://", default)
+    s.mount("http://", default)
+    # Prefix dài hơn được requests ưu tiên -> pool riêng cho từng host
+    for host, size in dict(_settings["host_pool_sizes"]).items():
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=int(size), pool_block=False)
+        s.mount(f"https://{host}/", adapter)
+        s.mount(f"http://{host}/", adapter)
+    s.headers["Accept-Encoding"] = "gzip, deflate"
+    return s
+
+
+def configure_session(
+    *,
+    pool_connections: Optional[int] = None,
+    pool_maxsize: Optional[int] = None,
+    host_pool_sizes: Optional[Dict[str, int]] = None,
+) -> None:
+    """
+    Cấu hình lại session dùng chung (áp dụng cho các request sau đó).
+
+    Parameters
+    ----------
+    pool_connections : int, optional
+        Số host được giữ connection pool.
+    pool_maxsize : int, optional
+        Số kết nối keep-alive tối đa mỗi host (nên >= số luồng tải song song).
+    host_pool_sizes : dict, optional
+        Kích thước pool riêng theo host, ví dụ {"api-v2.xno.vn": 64}.
+    """
+    global _session
+    with _lock:
+        if pool_connections is not None:
+            _settings["pool_connections"] = max(1, int(pool_connections))
+        if pool_maxsize is not None:
+            _settings["pool_maxsize"] = max(1, int(pool_maxsize))
+        if host_pool_sizes is not None:
+            _settings["host_pool_sizes"] = {h: max(1, int(n)) for h, n in host_pool_sizes.items()}
+        old, _session = _session, None
+    if old is not None:
+        old.close()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide shared session (created lazily)."""
+    global _session
+    s = _session
+    if s is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+            s = _session
+    return s
+
+
+def close_session() -> None:
+    """Đóng session hiện tại (giải phóng kết nối); lần gọi sau sẽ tạo session mới."""
+    global _session
+    with _lock:
+        old, _session = _session, None
+    if old is not None:
+        old.close()
+
+
+# Rate limit/circuit breaker vẫn tính theo URL gốc; chỉ URL thực sự gửi đi bị đổi
+_url_rewriter: Optional[Callable[[str], str]] = None
+# Tuple (copy-on-write) để hot path không phải lấy lock
+_response_hooks: Tuple[Callable[..., None], ...] = ()
+
+
+def set_url_rewriter(fn: Optional[Callable[[str], str]]) -> Optional[Callable[[str], str]]:
+    """Đặt hàm đổi URL đích (None = tắt); trả về hàm cũ để có thể khôi phục."""
+    global _url_rewriter
+    old, _url_rewriter = _url_rewriter, fn
+    return old
+
+
+def rewrite_url(url: str) -> str:
+    """URL thực sự được gửi đi cho `url` (không đổi nếu chưa đặt rewriter)."""
+    fn = _url_rewriter
+    return url if fn is None else fn(url)
+
+
+def add_response_hook(fn: Callable[[str, str, Dict[str, Any], requests.Response], None]) -> None:
+    """Đăng ký fn(method, url_gốc, kwargs, response), gọi với response cuối cùng của mỗi request."""
+    global _response_hooks
+    with _lock:
+        _response_hooks = _response_hooks + (fn,)
+
+
+def remove_response_hook(fn: Callable[..., None]) -> None:
+    global _response_hooks
+    with _lock:
+        _response_hooks = tuple(h for h in _response_hooks if h is not fn)
+
+
+def _notify(method: str, url: str, kwargs: Dict[str, Any], resp: requests.Response) -> requests.Response:
+    for hook in _response_hooks:
+        try:
+            hook(method, url, kwargs, resp)
+        except Exception:
+            pass  # hook quan sát không được làm hỏng request
+    return resp
+
+
+def request(method: str, url: str, *, retry: Optional[RetryPolicy] = None, **kwargs) -> requests.Response:
+    """
+    Gửi request qua session dùng chung. Tham số giống `requests.request`, thêm:
+    - retry: RetryPolicy (mặc định: get_retry_policy()); lỗi mạng/timeout và status
+      retryable được thử lại với backoff, tôn trọng Retry-After.
+    Trả về Response cuối cùng (caller tự raise_for_status); raise CircuitOpenError nếu
+    host đang bị ngắt mạch, hoặc lỗi mạng cuối cùng khi hết lượt retry.
+    """
+    policy = retry if retry is not None else get_retry_policy()
+    limiter = get_rate_limiter()
+    breaker = get_circuit_breaker()
+    method = method.upper()
+
+    start = time.monotonic()
+    attempt = 0
+    try:
+        # Breaker tính theo lời gọi: kiểm tra 1 lần, ghi kết quả 1 lần sau khi hết retry
+        breaker.before_call(url)
+        while True:
+            limiter.acquire(url)
+            try:
+                resp = get_session().request(method, rewrite_url(url), **kwargs)
+            except Exception as e:
+                if not policy.is_retryable_exception(e) or attempt >= policy.retries:
+                    raise
+                time.sleep(policy.delay(attempt))
+                attempt += 1
+                continue
+
+            limiter.feedback(url, resp.status_code)
+            if not policy.is_retryable_status(resp.status_code) or attempt >= policy.retries:
+                break
+            delay = policy.delay(attempt, parse_retry_after(resp.headers.get("Retry-After")))
+            if delay is None:
+                break
+            resp.close()
+            time.sleep(delay)
+            attempt += 1
+    except Exception as e:
+        # Mọi lỗi (kể cả lỗi không retry như ChunkedEncodingError) đều báo breaker,
+        # nếu không lượt thử half-open bị giữ mãi và host bị chặn vĩnh viễn.
+        if not isinstance(e, CircuitOpenError):
+            breaker.record_failure(url)
+        _observe(method, url, None, start, attempt, type(e).__name__)
+        raise
+    except BaseException:
+        breaker.release(url)  # KeyboardInterrupt/GeneratorExit: không phải lỗi của host
+        raise
+
+    if policy.is_retryable_status(resp.status_code):
+        breaker.record_failure(url)
+    else:
+        breaker.record_success(url)
+    _observe(method, url, resp, start, attempt, resp.status_code)
+    return _notify(method, url, kwargs, resp)
+
+
+def _observe(method: str, url: str, resp: Optional[requests.Response], start: float, retries: int, status) -> None:
+    registry = get_registry()
+    if not registry.enabled:
+        return
+    bytes_in = bytes_out = 0
+    if resp is not None:
+        length = resp.headers.get("Content-Length")
+        bytes_in = int(length) if length and length.isdigit() else len(resp.content)
+        body = resp.request.body if resp.request is not None else None
+        bytes_out = len(body) if body else 0
+    registry.observe_request(
+        method, url, status=status, seconds=time.monotonic() - start,
+        bytes_in=bytes_in, bytes_out=bytes_out, retries=retries,
+    )
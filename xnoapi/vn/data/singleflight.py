@@ -0,0 +1,95 @@
+"""
+singleflight.py — Gộp các lời gọi trùng nhau đang chạy đồng thời.
+
+Khi nhiều thread cùng xin một dữ liệu (cùng method + URL + params ...) trong lúc
+request đầu tiên chưa xong, chỉ request đầu tiên được gửi; các thread còn lại chờ
+và nhận chung kết quả (hoặc chung exception). Không phải cache: xong là quên.
+
+Kết quả được chia sẻ giữa các caller -> coi như read-only.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .instrument import get_registry
+
+__all__ = ["SingleFlight", "request_key", "get_singleflight", "configure_singleflight"]
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls sharing the same key into one execution."""
+
+    def __init__(self):
+        self.enabled = True
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0  # số lời gọi đã được gộp (không gửi request riêng)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Chạy fn() cho key, hoặc chờ lời gọi đang chạy với cùng key và dùng chung kết quả."""
+        if not self.enabled:
+            return fn()
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        get_registry().observe_cache("singleflight", "miss" if leader else "coalesced")
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+
+def _stable(obj: Any) -> str:
+    if obj is None:
+        return ""
+    try:
+        return json.dumps(obj, sort_keys=True, default=str, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return repr(obj)
+
+
+def request_key(method: str, url: str, *, params=None, payload=None, headers=None) -> tuple:
+    """Khóa gộp request: method + URL + params + body + headers (đã chuẩn hóa thứ tự)."""
+    return (method.upper(), url, _stable(params), _stable(payload), _stable(headers))
+
+
+_default = SingleFlight()
+
+
+def get_singleflight() -> SingleFlight:
+    """Return the process-wide SingleFlight group used by the data layer."""
+    return _default
+
+
+def configure_singleflight(*, enabled: bool) -> None:
+    """Bật/tắt gộp request trùng nhau (mặc định bật)."""
+    _default.enabled = bool(enabled)
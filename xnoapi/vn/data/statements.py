@@ -0,0 +1,248 @@
+"""
+statements.py — Bảng báo cáo tài chính toàn thị trường dạng long, lưu cục bộ.
+
+Tải (symbol x report x period) song song qua Finance._fetch, chuẩn hóa về một bảng
+long duy nhất:
+
+    ticker, year, quarter, period, report, item, value
+
+(period: "quarter" | "year"; report: "income_statement" | "balance_sheet" | "cash_flow")
+
+và lưu vào một file Parquet. Các lần load sau chỉ tải lại những lát
+(ticker, report, period) đã cũ hơn `max_age`, nên truy vấn cắt ngang (cross-section)
+trở thành đọc file cục bộ. Cần `pyarrow` (pip install pyarrow).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["StatementStore", "load_statements"]
+
+REPORTS = ("income_statement", "balance_sheet", "cash_flow")
+PERIODS = ("quarter", "year")
+_KEYS = ["ticker", "year", "quarter"]
+_COLUMNS = ["ticker", "year", "quarter", "period", "report", "item", "value"]
+_SLICE = ["ticker", "report", "period"]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except Exception as e:
+        raise ImportError("Thiếu thư viện 'pyarrow'. Hãy cài: pip install pyarrow") from e
+
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "ticker": pd.Series(dtype=str),
+            "year": pd.Series(dtype="int64"),
+            "quarter": pd.Series(dtype="int64"),
+            "period": pd.Series(dtype=str),
+            "report": pd.Series(dtype=str),
+            "item": pd.Series(dtype=str),
+            "value": pd.Series(dtype="float64"),
+        }
+    )
+
+
+def _to_long(df: pd.DataFrame, ticker: str, report: str, period: str) -> pd.DataFrame:
+    """Bảng rộng của TCBS (mỗi dòng 1 kỳ, mỗi cột 1 chỉ tiêu) -> long (ticker, year, quarter, item, value)."""
+    if df is None or df.empty or "year" not in df.columns:
+        return _empty()
+    df = df.copy()
+    df["ticker"] = ticker
+    if "quarter" not in df.columns:
+        df["quarter"] = 0
+    items = [c for c in df.columns if c not in _KEYS]
+    long = df.melt(id_vars=_KEYS, value_vars=items, var_name="item", value_name="value")
+    long["value"] = pd.to_numeric(long["value"], errors="coerce")
+    # year không parse được ("", "N/A"...) -> NaN rồi bỏ, trước khi ép int64
+    long["year"] = pd.to_numeric(long["year"], errors="coerce")
+    long = long.dropna(subset=["value", "year"])
+    return pd.DataFrame(
+        {
+            "ticker": long["ticker"].astype(str).to_numpy(),
+            "year": long["year"].to_numpy(dtype=np.int64),
+            "quarter": pd.to_numeric(long["quarter"], errors="coerce").fillna(0).to_numpy(dtype=np.int64),
+            "period": period,
+            "report": report,
+            "item": long["item"].astype(str).to_numpy(),
+            "value": long["value"].to_numpy(dtype=np.float64),
+        },
+        columns=_COLUMNS,
+    )
+
+
+class StatementStore:
+    """
+    Local long-format financial statements panel (one Parquet file + fetch metadata).
+
+    Parameters
+    ----------
+    root : str
+        Directory holding ``statements.parquet`` and ``statements.meta.json``.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"StatementStore(root={self.root!r})"
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.root, "statements.parquet")
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.root, "statements.meta.json")
+
+    # ───────────────────────── Public API ─────────────────────────
+
+    def read(
+        self,
+        tickers: Optional[Iterable[str]] = None,
+        reports: Optional[Iterable[str]] = None,
+        periods: Optional[Iterable[str]] = None,
+        items: Optional[Iterable[str]] = None,
+    ) -> pd.DataFrame:
+        """Đọc panel (lọc ngay khi đọc Parquet); DataFrame rỗng nếu chưa có dữ liệu."""
+        if not os.path.exists(self.path):
+            return _empty()
+        _require_pyarrow()
+        filters = []
+        for col, vals in (("ticker", tickers), ("report", reports), ("period", periods), ("item", items)):
+            if vals is not None:
+                filters.append((col, "in", [str(v) for v in vals]))
+        with self._lock:
+            return pd.read_parquet(self.path, filters=filters or None).reindex(columns=_COLUMNS)
+
+    def fetched_at(self) -> Dict[str, float]:
+        """{"TICKER|report|period": epoch giây lần tải gần nhất}."""
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def upsert(self, new: pd.DataFrame, slices: Iterable[Tuple[str, str, str]]) -> None:
+        """
+        Thay toàn bộ các lát (ticker, report, period) trong `slices` bằng dữ liệu trong `new`
+        (kể cả khi kỳ cũ bị sửa/bỏ chỉ tiêu) và ghi lại nguyên tử.
+        """
+        _require_pyarrow()
+        slices = list(slices)
+        now = time.time()
+        with self._lock:
+            old = pd.read_parquet(self.path) if os.path.exists(self.path) else _empty()
+            if slices and not old.empty:
+                drop = pd.MultiIndex.from_tuples(slices, names=_SLICE)
+                old = old[~pd.MultiIndex.from_frame(old[_SLICE]).isin(drop)]
+            frames = [f for f in (old, new) if not f.empty]
+            df = pd.concat(frames, ignore_index=True) if frames else _empty()
+            df = df.sort_values(_KEYS + ["period", "report", "item"], kind="stable").reset_index(drop=True)
+            os.makedirs(self.root, exist_ok=True)
+            self._replace(self.path, lambda tmp: df[_COLUMNS].to_parquet(tmp, index=False))
+
+            meta = self.fetched_at()
+            meta.update({"|".join(s): now for s in slices})
+            self._replace(self.meta_path, lambda tmp: _dump_json(meta, tmp))
+
+    @staticmethod
+    def _replace(path: str, write) -> None:
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        write(tmp)
+        os.replace(tmp, path)
+
+
+def _dump_json(obj, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+
+
+def _fetch_slice(ticker: str, report: str, period: str) -> pd.DataFrame:
+    from .stocks import Finance
+
+    return _to_long(Finance(ticker)._fetch(report, period), ticker, report, period)
+
+
+def load_statements(
+    symbols: Optional[Iterable[str]] = None,
+    reports: Iterable[str] = REPORTS,
+    periods: Iterable[str] = PERIODS,
+    *,
+    store: Union[StatementStore, str, None] = None,
+    max_age: float = 24 * 3600.0,
+    max_workers: int = 8,
+) -> Tuple[pd.DataFrame, Dict[Tuple[str, str, str], Exception]]:
+    """
+    Tải BCTC (income_statement / balance_sheet / cash_flow, quý & năm) cho nhiều mã song song.
+
+    Args:
+        symbols: danh sách mã (mặc định: Listing().all_symbols())
+        reports: tập con của ("income_statement", "balance_sheet", "cash_flow")
+        periods: tập con của ("quarter", "year")
+        store: StatementStore hoặc thư mục (tùy chọn). Nếu có, chỉ tải các lát
+               (ticker, report, period) cũ hơn max_age, gộp vào file Parquet và đọc kết quả từ đó.
+        max_age: số giây một lát được coi là còn mới (chỉ dùng khi có store)
+        max_workers: số request đồng thời
+
+    Returns:
+        (panel, errors): panel dạng long index (ticker, year, quarter), cột
+        period/report/item/value; errors = {(ticker, report, period): Exception}.
+    """
+    reports = list(reports)
+    periods = list(periods)
+    bad = [r for r in reports if r not in REPORTS] + [p for p in periods if p not in PERIODS]
+    if bad:
+        raise ValueError(f"Giá trị không hợp lệ: {bad}; reports ∈ {REPORTS}, periods ∈ {PERIODS}.")
+    if symbols is None:
+        from .stocks import Listing
+
+        symbols = Listing().all_symbols()["symbol"].tolist()
+    tickers = list(dict.fromkeys(str(s).strip().upper() for s in symbols if str(s).strip()))
+
+    if isinstance(store, (str, os.PathLike)):
+        store = StatementStore(os.fspath(store))
+    if store is not None and not isinstance(store, StatementStore):
+        raise TypeError(f"store phải là StatementStore hoặc đường dẫn, nhận {type(store)}")
+
+    jobs: List[Tuple[str, str, str]] = [(t, r, p) for t in tickers for r in reports for p in periods]
+    if store is not None:
+        seen = store.fetched_at()
+        now = time.time()
+        jobs = [j for j in jobs if now - seen.get("|".join(j), 0.0) >= max_age]
+
+    frames: List[pd.DataFrame] = []
+    done: List[Tuple[str, str, str]] = []
+    errors: Dict[Tuple[str, str, str], Exception] = {}
+    if jobs:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as ex:
+            futures = {ex.submit(_fetch_slice, *j): j for j in jobs}
+            for fut in as_completed(futures):
+                j = futures[fut]
+                try:
+                    frames.append(fut.result())
+                    done.append(j)
+                except Exception as e:
+                    errors[j] = e
+
+    new = pd.concat(frames, ignore_index=True) if frames else _empty()
+    if store is not None:
+        if done:
+            store.upsert(new, done)
+        panel = store.read(tickers=tickers, reports=reports, periods=periods)
+    else:
+        panel = new.sort_values(_KEYS + ["period", "report", "item"], kind="stable")
+    return panel.set_index(_KEYS), errors
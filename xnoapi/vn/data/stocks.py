@@ -5,12 +5,16 @@ stocks.py — Lấy OHLCV từ XNO API v2, bỏ giới hạn ~500 dòng.
 
 Public:
 - list_liquid_asset()
-- get_hist(asset_name, resolution="m")  # resolution: "m" | "h"
+- get_hist(asset_name, resolution="m", store=None)  # resolution: "m" | "h"
+- get_hist_many(symbols, resolution="m", max_workers=8)  # nhiều mã song song
+- iter_hist(asset_name, resolution="m", chunk_size=None)  # generator, từng trang/chunk
 
 Đặc điểm:
-- Parser "chịu lỗi": JSON 1 khối, nhiều khối JSON ghép nối, NDJSON, dict-of-arrays (t/o/h/l/c/v),
+- Fast path: response dict-of-arrays {t,o,h,l,c,v} đổ thẳng vào buffer NumPy, chỉ dựng 1 DataFrame ở cuối.
+- Parser "chịu lỗi" (fallback): JSON 1 khối, nhiều khối JSON ghép nối, NDJSON, dict-of-arrays (t/o/h/l/c/v),
   list-of-dicts, CSV fallback.
 - Tự động phân trang theo thời gian: gọi nhiều request với from=last_ts+step cho tới khi hết dữ liệu.
+- Tùy chọn kho cục bộ (OHLCVStore): chỉ tải phần mới kể từ epoch cuối đã lưu.
 - Output: DataFrame ["Date","time","Open","High","Low","Close","volume"]
   (KHÔNG đổi timezone; format từ datetime hiện có).
 """
@@ -20,12 +24,22 @@ from __future__ import annotations
 import io
 import json
 import itertools
-from typing import Any, Dict, List, Union, Optional
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union, Optional
 
+import numpy as np
 import pandas as pd
 import requests
-from .utils import Config
+from .utils import APIError, Config
+from . import session as _http
 from .core import send_request
+from .store import OHLCVStore, _as_store
+from .singleflight import get_singleflight, request_key
+from .cache import TTLCache
+from .hedge import hedged
+from .instrument import get_registry
 from .const import (
     TRADING_URL, CHART_URL, INTRADAY_URL,
     INTERVAL_MAP, INTRADAY_MAP, OHLC_COLUMNS, OHLC_RENAME,
@@ -34,12 +48,14 @@ from .const import (
 import datetime as dt
 import requests
 
-__all__ = ["list_liquid_asset", "get_hist"]
+__all__ = ["list_liquid_asset", "get_hist", "get_hist_many", "iter_hist", "get_intraday_many"]
 
 # ===== Cấu hình nguồn XNO API v2 =====
 _STOCKS_API_BASE = "https://api-v2.xno.vn/quant-data/v1/stocks"
 _TIMEOUT = 30  # giây
 _MAX_REQUESTS = 2000  # giới hạn an toàn số lần phân trang
+_END_OF_TIME = 9999999999  # "to" mặc định khi không giới hạn cuối
+_CHUNK_SECONDS = {"m": 7 * 86400, "h": 90 * 86400}  # độ dài mỗi chunk khi fetch song song theo start/end
 
 # Giữ cho API cũ list_liquid_asset (nếu bạn dùng ở nơi khác)
 LAMBDA_URL = Config.get_link()
@@ -48,7 +64,7 @@ LAMBDA_URL = Config.get_link()
 def list_liquid_asset() -> pd.DataFrame:
     """Retrieve a list of highly liquid assets (qua Lambda cũ)."""
     api_key = Config.get_api_key()
-    r = requests.get(f"{LAMBDA_URL}/list-liquid-asset", headers={"x-api-key": api_key}, timeout=_TIMEOUT)
+    r = _http.request("GET", f"{LAMBDA_URL}/list-liquid-asset", headers={"x-api-key": api_key}, timeout=_TIMEOUT)
     r.raise_for_status()
     return pd.DataFrame(r.json())
 
@@ -322,43 +338,221 @@ def _format_date_time_output(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
-def _extract_last_epoch(df_seg: pd.DataFrame) -> Optional[int]:
-    """Lấy epoch giây cuối cùng của đoạn df_seg (sau normalize)."""
-    if df_seg.empty:
-        return None
-    ns = pd.to_datetime(df_seg["Date"]).astype("int64").max()
-    return int(ns // 1_000_000_000)
+_OUTPUT_MODES = {"str", "datetime", "epoch"}
 
 
-# ===================== Fetch từng trang thời gian =====================
+def _format_output(df: pd.DataFrame, output: str) -> pd.DataFrame:
+    """
+    Xuất df đã normalize (Date datetime, Open..Volume) theo chế độ:
+    - "str"      : Date/time dạng string (mặc định, tương thích cũ)
+    - "datetime" : DatetimeIndex "datetime" + Open/High/Low/Close (float64), volume
+    - "epoch"    : cột "epoch" (int64 giây) + Open/High/Low/Close (float64), volume
+    Hai chế độ sau bỏ qua vòng strftime/parse string.
+    """
+    if output == "str":
+        return _format_date_time_output(df)
+
+    ohlc = ["Open","High","Low","Close"]
+    if df.empty:
+        out = pd.DataFrame({c: pd.Series(dtype="float64") for c in ohlc + ["volume"]})
+        if output == "epoch":
+            return out.assign(epoch=pd.Series(dtype="int64"))[["epoch"] + ohlc + ["volume"]]
+        out.index = pd.DatetimeIndex([], name="datetime")
+        return out
+
+    dt_ns = pd.to_datetime(df["Date"]).astype("datetime64[ns]")
+    out = pd.DataFrame({c: df[c].to_numpy(dtype=np.float64, na_value=np.nan) for c in ohlc})
+    out["volume"] = pd.to_numeric(df["Volume"], errors="coerce").to_numpy()
+    if output == "epoch":
+        out.insert(0, "epoch", dt_ns.astype("int64").to_numpy() // 1_000_000_000)
+        return out
+    out.index = pd.DatetimeIndex(dt_ns.to_numpy(), name="datetime")
+    return out
+
+
+# ===================== Fast path: dict-of-arrays -> NumPy =====================
+
+def _parse_segment_arrays(parsed: Any) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Fast path cho response phổ biến {t,o,h,l,c,(v)} (có thể bọc trong "data"):
+    chuyển thẳng sang mảng NumPy, KHÔNG tạo DataFrame trung gian.
+    Trả về {"t": int64 ns, "o","h","l","c","v": float64} hoặc None nếu payload
+    không đúng dạng (khi đó dùng parser chịu lỗi).
+    """
+    if isinstance(parsed, dict) and "data" in parsed and isinstance(parsed["data"], dict):
+        parsed = parsed["data"]
+    if not isinstance(parsed, dict):
+        return None
+    t = parsed.get("t")
+    if not isinstance(t, list):
+        return None
+    n = len(t)
+    cols = {}
+    try:
+        for k in ("o", "h", "l", "c"):
+            v = parsed.get(k)
+            if not isinstance(v, list) or len(v) != n:
+                return None
+            cols[k] = np.asarray(v, dtype=np.float64)
+        v = parsed.get("v")
+        if v is None:
+            cols["v"] = np.full(n, np.nan)
+        elif isinstance(v, list) and len(v) == n:
+            cols["v"] = np.asarray(v, dtype=np.float64)
+        else:
+            return None
+        tf = np.asarray(t, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    if n and not np.isfinite(tf).all():
+        return None
+    ti = tf.astype(np.int64)
+    # Tự nhận epoch giây/ms (giống _normalize_ohlcv_df)
+    scale = 1_000_000 if (n and (ti > 1_000_000_000_000).any()) else 1_000_000_000
+    cols["t"] = ti * scale
+    return cols
+
+
+def _frame_to_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """DataFrame normalize (Date, Open..Volume) -> dict mảng cùng dạng _parse_segment_arrays."""
+    return {
+        "t": pd.to_datetime(df["Date"]).astype("datetime64[ns]").astype("int64").to_numpy(),
+        "o": df["Open"].to_numpy(dtype=np.float64, na_value=np.nan),
+        "h": df["High"].to_numpy(dtype=np.float64, na_value=np.nan),
+        "l": df["Low"].to_numpy(dtype=np.float64, na_value=np.nan),
+        "c": df["Close"].to_numpy(dtype=np.float64, na_value=np.nan),
+        "v": df["Volume"].to_numpy(dtype=np.float64, na_value=np.nan),
+    }
 
-def _fetch_segment(symbol: str, resolution: str, start_from: int, api_token: str) -> pd.DataFrame:
+
+class _OHLCVBuffer:
     """
-    Gọi 1 request từ start_from -> 9999999999, trả về DataFrame đã normalize (có thể <=500 dòng).
-    Parser chịu lỗi & flatten đầy đủ.
+    Bộ đệm NumPy tăng trưởng (amortized doubling) để gom các trang OHLCV,
+    chỉ dựng 1 DataFrame ở cuối thay vì concat nhiều DataFrame trung gian.
     """
+
+    _KEYS = ("t", "o", "h", "l", "c", "v")
+
+    def __init__(self, capacity: int = 4096):
+        self._n = 0
+        self._cap = max(1, capacity)
+        self._arr = {k: np.empty(self._cap, dtype=np.int64 if k == "t" else np.float64) for k in self._KEYS}
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _reserve(self, extra: int) -> None:
+        need = self._n + extra
+        if need <= self._cap:
+            return
+        cap = self._cap
+        while cap < need:
+            cap *= 2
+        for k, a in self._arr.items():
+            b = np.empty(cap, dtype=a.dtype)
+            b[: self._n] = a[: self._n]
+            self._arr[k] = b
+        self._cap = cap
+
+    def append_arrays(self, cols: Dict[str, np.ndarray]) -> Optional[int]:
+        """Append kết quả _parse_segment_arrays; trả về epoch giây lớn nhất của trang."""
+        m = len(cols["t"])
+        if m == 0:
+            return None
+        self._reserve(m)
+        for k in self._KEYS:
+            self._arr[k][self._n : self._n + m] = cols[k]
+        self._n += m
+        return int(cols["t"].max() // 1_000_000_000)
+
+    def append_frame(self, df: pd.DataFrame) -> Optional[int]:
+        """Append DataFrame đã normalize (kết quả parser chịu lỗi)."""
+        if df.empty:
+            return None
+        return self.append_arrays(_frame_to_arrays(df))
+
+    def extend(self, other: "_OHLCVBuffer") -> None:
+        """Append toàn bộ dữ liệu của buffer khác."""
+        if len(other):
+            self.append_arrays({k: a[: len(other)] for k, a in other._arr.items()})
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame normalize (Date, Open..Volume): sort theo Date, bar trùng -> giữ bản sau."""
+        n = self._n
+        if n == 0:
+            return pd.DataFrame(columns=["Date","Open","High","Low","Close","Volume"])
+        t = self._arr["t"][:n]
+        # Stable sort rồi giữ phần tử cuối của mỗi nhóm Date trùng (= keep="last")
+        order = np.argsort(t, kind="stable")
+        ts = t[order]
+        keep = np.ones(n, dtype=bool)
+        keep[:-1] = ts[1:] != ts[:-1]
+        idx = order[keep]
+        vol = self._arr["v"][idx]
+        if not np.isnan(vol).any() and np.array_equal(vol, np.floor(vol)):
+            vol = vol.astype(np.int64)
+        return pd.DataFrame({
+            "Date": t[idx].view("datetime64[ns]"),
+            "Open": self._arr["o"][idx],
+            "High": self._arr["h"][idx],
+            "Low": self._arr["l"][idx],
+            "Close": self._arr["c"][idx],
+            "Volume": vol,
+        })
+
+
+# ===================== Fetch từng trang thời gian =====================
+
+def _fetch_segment_text(
+    symbol: str, resolution: str, start_from: int, api_token: str, end_to: int = _END_OF_TIME
+) -> str:
+    """Gọi 1 request từ start_from -> end_to, trả về body text (chưa parse)."""
     url = f"{_STOCKS_API_BASE}/{symbol}/ohlcv/{resolution}"
-    params = {"from": start_from, "to": 9999999999}
+    params = {"from": start_from, "to": end_to}
     headers = {"accept": "application/json", "Authorization": api_token}
 
-    r = requests.get(url, params=params, headers=headers, timeout=_TIMEOUT)
-    r.raise_for_status()
-    if not r.encoding:
-        r.encoding = r.apparent_encoding
+    def _fetch() -> str:
+        r = _http.request("GET", url, params=params, headers=headers, timeout=_TIMEOUT)
+        r.raise_for_status()
+        if not r.encoding:
+            r.encoding = r.apparent_encoding
+        return r.text
+
+    key = request_key("GET", url, params=params, headers=headers)
+    return get_singleflight().do(key, _fetch)
+
+
+def _segment_arrays(text: str) -> Dict[str, np.ndarray]:
+    """Parse 1 trang thành dict mảng: fast path NumPy, fallback parser chịu lỗi."""
+    try:
+        cols = _parse_segment_arrays(json.loads(text))
+    except ValueError:
+        cols = None
+    if cols is not None:
+        return cols
+    return _frame_to_arrays(_parse_segment_text(text))
 
+
+def _append_segment_text(buf: "_OHLCVBuffer", text: str) -> Optional[int]:
+    """Parse 1 trang vào buffer. Trả về epoch giây cuối của trang (None nếu trang rỗng)."""
+    return buf.append_arrays(_segment_arrays(text))
+
+
+def _parse_segment_text(text: str) -> pd.DataFrame:
+    """Parse body của 1 trang OHLCV (mọi định dạng hỗ trợ) thành DataFrame đã normalize."""
     try:
-        parsed = r.json()
+        parsed = json.loads(text)
     except Exception:
-        blocks = _scan_all_json_blocks(r.text)
+        blocks = _scan_all_json_blocks(text)
         if blocks:
             if all(isinstance(b, dict) and {"t","o","h","l","c"}.issubset(b.keys()) for b in blocks):
                 parsed = _merge_ohlcv_dict_blocks(blocks)
             else:
                 parsed = blocks
         else:
-            parsed = _json_relaxed(r.text)
+            parsed = _json_relaxed(text)
 
-    df = _as_dataframe(parsed, r.text)
+    df = _as_dataframe(parsed, text)
     df = _flatten_if_cell_is_list(df)
     df = _normalize_ohlcv_df(df)
     return df
@@ -421,6 +615,7 @@ class Company:
     def ratio_summary(self):
         BASE = "https://apipubaws.tcbs.com.vn"; ANALYSIS = "tcanalysis"
         url = f"{BASE}/{ANALYSIS}/v1/ticker/{self.symbol}/ratios"
+        # Không hedge: /financialratio trả bảng theo kỳ (khác dạng /ratios), chỉ dùng khi /ratios lỗi
         try:
             data = send_request(url)
             return pd.DataFrame(data, index=[0]) if isinstance(data, dict) else pd.DataFrame(data)
@@ -461,15 +656,35 @@ class Finance:
 
 # ===================== Reorganized: Fund =====================
 
+_FUND_BASE = "https://api.fmarket.vn/res/products"
+_FUND_TTL = 3600.0  # giây; listing + code->id ít thay đổi trong ngày
+_FUND_CACHE = TTLCache(max_bytes=64 * 1024 * 1024, default_ttl=_FUND_TTL, name="fund")
+_FUND_DETAIL_KINDS = ("nav_report", "top_holding", "industry_holding", "asset_holding")
+_FUND_PATH_STYLES = ("public/{c}/{kind}", "{c}/{kind}")
+# kind -> (style, field) đã thành công gần nhất; lần sau thử URL đó trước
+_FUND_PATH_HINTS: Dict[str, Tuple[int, str]] = {}
+_FUND_HINTS_LOCK = threading.Lock()  # bulk_details ghi hint từ nhiều luồng
+
+
 class Fund:
     """Mutual funds via Fmarket."""
 
     def __init__(self):
         pass
 
-    def listing(self, fund_type: str = "") -> pd.DataFrame:
-        BASE = "https://api.fmarket.vn/res/products"
-        url = f"{BASE}/filter"
+    def listing(self, fund_type: str = "", *, force_refresh: bool = False) -> pd.DataFrame:
+        """Danh sách quỹ (cache trong _FUND_TTL giây; force_refresh=True để tải lại)."""
+        key = ("listing", fund_type)
+        if force_refresh:
+            _FUND_CACHE.pop(key)
+        df = _FUND_CACHE.get(key)
+        if df is None:
+            df = get_singleflight().do(("fund", key), lambda: Fund._load_listing(fund_type))
+        return df.copy()
+
+    @staticmethod
+    def _load_listing(fund_type: str) -> pd.DataFrame:
+        url = f"{_FUND_BASE}/filter"
         payload = {
             "types": ["NEW_FUND", "TRADING_FUND"],
             "issuerIds": [],
@@ -488,13 +703,13 @@ class Fund:
             data = send_request(url, method="POST", payload=payload)
             rows = (data or {}).get("data", {}).get("rows", [])
             df = pd.json_normalize(rows)
-            return df
         except Exception:
-            data = send_request(f"{BASE}/public", params={"page": 1, "size": 500})
+            data = send_request(f"{_FUND_BASE}/public", params={"page": 1, "size": 500})
             df = pd.json_normalize((data or {}).get("data", []))
             if fund_type and "dataFundAssetType.name" in df.columns:
                 df = df[df["dataFundAssetType.name"].eq(fund_type)]
-            return df
+        _FUND_CACHE.set(("listing", fund_type), df)
+        return df
 
     def filter(self, q: str) -> pd.DataFrame:
         df = self.listing()
@@ -506,98 +721,123 @@ class Fund:
         return df[mask]
 
     @staticmethod
-    def _resolve_candidates(code_or_id: str) -> list[str]:
-        cands = []
+    def _resolve_named(code_or_id: str) -> list[tuple[str, str]]:
+        """[(field, value)] theo thứ tự: giá trị nhập, rồi code/id/vsdFeeId khớp trong listing (có cache)."""
         key = str(code_or_id).strip()
+        cached = _FUND_CACHE.get(("resolve", key))
+        if cached is not None:
+            return list(cached)
+        cands: list[tuple[str, str]] = []
         if key:
-            cands.append(key)
+            cands.append(("input", key))
         try:
             _df = Fund().listing()
             if not _df.empty:
                 cols = _df.columns
-                def _add(val):
+                def _add(field, val):
                     if val is None:
                         return
                     s = str(val).strip()
-                    if s and s not in cands:
-                        cands.append(s)
-                if "code" in cols and _df["code"].notna().any():
-                    m = _df["code"].astype(str).str.upper().eq(key.upper())
-                    if m.any():
-                        r = _df[m].iloc[0]
-                        for k in ["code", "id", "vsdFeeId"]:
-                            if k in cols:
-                                _add(r.get(k))
-                if "id" in cols and _df["id"].notna().any():
-                    m = _df["id"].astype(str).eq(key)
-                    if m.any():
-                        r = _df[m].iloc[0]
-                        for k in ["code", "id", "vsdFeeId"]:
-                            if k in cols:
-                                _add(r.get(k))
-                if "vsdFeeId" in cols and _df["vsdFeeId"].notna().any():
-                    m = _df["vsdFeeId"].astype(str).eq(key)
-                    if m.any():
-                        r = _df[m].iloc[0]
-                        for k in ["code", "id", "vsdFeeId"]:
-                            if k in cols:
-                                _add(r.get(k))
+                    if s and s not in [v for _, v in cands]:
+                        cands.append((field, s))
+                for match_col, upper in (("code", True), ("id", False), ("vsdFeeId", False)):
+                    if match_col in cols and _df[match_col].notna().any():
+                        col = _df[match_col].astype(str)
+                        m = col.str.upper().eq(key.upper()) if upper else col.eq(key)
+                        if m.any():
+                            r = _df[m].iloc[0]
+                            for k in ["code", "id", "vsdFeeId"]:
+                                if k in cols:
+                                    _add(k, r.get(k))
+            _FUND_CACHE.set(("resolve", key), tuple(cands))
         except Exception:
             pass
         return cands
 
     @staticmethod
-    def _try_paths(paths: list[str]) -> pd.DataFrame:
-        for url in paths:
-            try:
-                data = send_request(url)
-                if isinstance(data, list):
-                    return pd.DataFrame(data)
-                return pd.json_normalize(data)
-            except Exception:
-                continue
-        return pd.DataFrame()
+    def _detail(kind: str, code_or_id: str) -> pd.DataFrame:
+        """Thử các URL (public/{c}, {c}) x ứng viên; URL kiểu đã thành công trước đó được thử đầu tiên."""
+        slug = kind.replace("_", "-")
+        named = Fund._resolve_named(code_or_id)
+        order = [(si, field, value) for si in range(len(_FUND_PATH_STYLES)) for field, value in named]
+        with _FUND_HINTS_LOCK:
+            hint = _FUND_PATH_HINTS.get(kind)
+        if hint is not None:
+            order.sort(key=lambda o: (o[0], o[1]) != hint)  # sort ổn định: chỉ đưa hint lên đầu
+        if not order:
+            return pd.DataFrame()
+
+        def _attempt(si, field, value):
+            url = f"{_FUND_BASE}/" + _FUND_PATH_STYLES[si].format(c=value, kind=slug)
+            data = send_request(url)
+            df = pd.DataFrame(data) if isinstance(data, list) else pd.json_normalize(data)
+            return (si, field), df
+
+        # URL lỗi (404) chuyển ngay sang ứng viên kế tiếp; URL chậm được hedge sau ngưỡng p95
+        calls = [lambda o=o: _attempt(*o) for o in order]
+        try:
+            winner, df = hedged(calls, key="fmarket.detail")
+        except Exception:
+            return pd.DataFrame()
+        with _FUND_HINTS_LOCK:
+            _FUND_PATH_HINTS[kind] = winner
+        return df
+
+    @staticmethod
+    def bulk_details(
+        codes: Optional[List[str]] = None,
+        kinds: Tuple[str, ...] = _FUND_DETAIL_KINDS,
+        *,
+        max_workers: int = 8,
+    ) -> Dict[str, Dict[str, pd.DataFrame]]:
+        """
+        Tải song song nhiều loại chi tiết cho nhiều quỹ.
+
+        Args:
+            codes: danh sách mã/id quỹ (mặc định: toàn bộ cột "code" của listing)
+            kinds: tập con của ("nav_report","top_holding","industry_holding","asset_holding")
+            max_workers: số request đồng thời
+
+        Returns:
+            {code: {kind: DataFrame}} (DataFrame rỗng nếu không lấy được)
+        """
+        bad = [k for k in kinds if k not in _FUND_DETAIL_KINDS]
+        if bad:
+            raise ValueError(f"kinds không hợp lệ: {bad}; chỉ được phép {list(_FUND_DETAIL_KINDS)}.")
+        if codes is None:
+            df = Fund().listing()
+            codes = df["code"].dropna().astype(str).tolist() if "code" in df.columns else []
+        codes = list(dict.fromkeys(str(c).strip() for c in codes if str(c).strip()))
+
+        out: Dict[str, Dict[str, pd.DataFrame]] = {c: {} for c in codes}
+        jobs = [(c, k) for c in codes for k in kinds]
+        if not jobs:
+            return out
+        # Resolve trước (1 listing dùng chung) để các job không cùng chờ listing
+        Fund().listing()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as ex:
+            futures = {ex.submit(Fund._detail, k, c): (c, k) for c, k in jobs}
+            for fut in as_completed(futures):
+                c, k = futures[fut]
+                out[c][k] = fut.result()
+        return out
 
     class details:
         @staticmethod
         def nav_report(code_or_id: str) -> pd.DataFrame:
-            BASE = "https://api.fmarket.vn/res/products"
-            cands = Fund._resolve_candidates(code_or_id)
-            paths = (
-                [f"{BASE}/public/{c}/nav-report" for c in cands]
-                + [f"{BASE}/{c}/nav-report" for c in cands]
-            )
-            return Fund._try_paths(paths)
+            return Fund._detail("nav_report", code_or_id)
 
         @staticmethod
         def top_holding(code_or_id: str) -> pd.DataFrame:
-            BASE = "https://api.fmarket.vn/res/products"
-            cands = Fund._resolve_candidates(code_or_id)
-            paths = (
-                [f"{BASE}/public/{c}/top-holding" for c in cands]
-                + [f"{BASE}/{c}/top-holding" for c in cands]
-            )
-            return Fund._try_paths(paths)
+            return Fund._detail("top_holding", code_or_id)
 
         @staticmethod
         def industry_holding(code_or_id: str) -> pd.DataFrame:
-            BASE = "https://api.fmarket.vn/res/products"
-            cands = Fund._resolve_candidates(code_or_id)
-            paths = (
-                [f"{BASE}/public/{c}/industry-holding" for c in cands]
-                + [f"{BASE}/{c}/industry-holding" for c in cands]
-            )
-            return Fund._try_paths(paths)
+            return Fund._detail("industry_holding", code_or_id)
 
         @staticmethod
         def asset_holding(code_or_id: str) -> pd.DataFrame:
-            BASE = "https://api.fmarket.vn/res/products"
-            cands = Fund._resolve_candidates(code_or_id)
-            paths = (
-                [f"{BASE}/public/{c}/asset-holding" for c in cands]
-                + [f"{BASE}/{c}/asset-holding" for c in cands]
-            )
-            return Fund._try_paths(paths)
+            return Fund._detail("asset_holding", code_or_id)
 
 
 # ===================== Reorganized: Listing =====================
@@ -697,10 +937,13 @@ class Quote:
         df = df[df["time"] >= start_dt].reset_index(drop=True)
         return df
 
-    def intraday(self, page_size=100, last_time=None):
+    def _intraday_raw(self, page_size, last_time):
         url = f"{TRADING_URL}{INTRADAY_URL}/LEData/getAll"
         payload = {"symbol": self.symbol, "limit": int(page_size), "truncTime": last_time}
-        data = send_request(url, method="POST", payload=payload)
+        return send_request(url, method="POST", payload=payload)
+
+    def intraday(self, page_size=100, last_time=None):
+        data = self._intraday_raw(page_size, last_time)
         if not data:
             return pd.DataFrame(columns=list(INTRADAY_MAP.values()))
 
@@ -717,6 +960,66 @@ class Quote:
 
         return df
 
+    def iter_intraday(self, page_size=1000, max_pages=None) -> Iterator[pd.DataFrame]:
+        """
+        Tự phân trang lùi theo truncTime, yield từng trang tick (đã loại id trùng giữa các trang)
+        dạng mảng gọn: time (int64 epoch ms), price (float64), volume (int64),
+        match_type (category), id (int64 nếu là số).
+
+        truncTime là mốc bao gồm: nếu một mốc thời gian có nhiều tick hơn page_size, trang đó
+        được tải lại với limit lớn dần (tới 8 x page_size); nếu vẫn chưa đủ thì bỏ qua phần còn
+        lại của mốc đó (phát RuntimeWarning) và phân trang tiếp từ mốc trước đó.
+        """
+        page_size = int(page_size)
+        if page_size < 1:
+            raise ValueError("page_size phải >= 1.")
+        seen = set()
+        cursor = None
+        pages = 0
+        limit = _MAX_REQUESTS if max_pages is None else int(max_pages)
+        fetch = page_size
+        while pages < limit:
+            data = self._intraday_raw(fetch, cursor)
+            pages += 1
+            if not data:
+                break
+            page, next_cursor = _intraday_page(data)
+            fresh = ~page["id"].isin(seen) if len(seen) else np.ones(len(page), dtype=bool)
+            page = page[fresh]
+            if not page.empty:
+                seen.update(page["id"].tolist())
+                yield page.reset_index(drop=True)
+            # So với page_size gốc: API có thể tự giới hạn limit thấp hơn số đã xin
+            if len(data) < page_size or next_cursor is None:
+                break
+            if next_cursor != cursor and not page.empty:
+                cursor, fetch = next_cursor, page_size
+                continue
+            # Kẹt tại 1 mốc truncTime (toàn tick đã thấy)
+            if fetch < 8 * page_size:
+                fetch *= 2
+                continue
+            before = _intraday_cursor_before(next_cursor)
+            warnings.warn(
+                f"{self.symbol}: mốc truncTime={next_cursor!r} có ít nhất {fetch} tick; "
+                "phần tick còn lại của mốc này bị bỏ qua.",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+            if before is None:
+                break
+            cursor, fetch = before, page_size
+
+    def intraday_all(self, page_size=1000, max_pages=None) -> pd.DataFrame:
+        """Toàn bộ tick của phiên (ghép iter_intraday), sắp theo thời gian tăng dần."""
+        pages = list(self.iter_intraday(page_size=page_size, max_pages=max_pages))
+        if not pages:
+            return _intraday_empty()
+        df = pd.concat(pages, ignore_index=True)
+        df = df.drop_duplicates(subset="id", keep="first").sort_values(["time", "id"], kind="stable")
+        df["match_type"] = df["match_type"].astype("category")
+        return df.reset_index(drop=True)
+
     def price_depth(self):
         data = send_request(PRICE_DEPTH_URL, method="POST", payload={"symbol": self.symbol})
         if not data:
@@ -738,6 +1041,58 @@ class Quote:
         })
 
 
+def _intraday_empty() -> pd.DataFrame:
+    return pd.DataFrame({
+        "time": pd.Series(dtype="int64"),
+        "price": pd.Series(dtype="float64"),
+        "volume": pd.Series(dtype="int64"),
+        "match_type": pd.Series(dtype="category"),
+        "id": pd.Series(dtype="int64"),
+    })
+
+
+def _intraday_cursor_before(cursor: Any) -> Any:
+    """truncTime ngay trước `cursor` (cùng kiểu: số hoặc chuỗi số); None nếu không lùi được."""
+    if isinstance(cursor, bool):
+        return None
+    if isinstance(cursor, (int, np.integer)):
+        return cursor - 1
+    if isinstance(cursor, str) and cursor.strip().lstrip("-").isdigit():
+        return str(int(cursor) - 1)
+    return None
+
+
+def _intraday_page(data: List[Dict[str, Any]]) -> Tuple[pd.DataFrame, Any]:
+    """1 trang LEData thô -> (DataFrame kiểu gọn, truncTime của tick cũ nhất để phân trang tiếp)."""
+    raw = pd.DataFrame(data, columns=list(INTRADAY_MAP.keys()))
+
+    t = pd.to_numeric(raw["truncTime"], errors="coerce")
+    if t.notna().any():
+        ms = t.to_numpy(dtype=np.float64, na_value=np.nan)
+        if not (np.nanmax(ms) > 10**12):
+            ms = ms * 1000.0
+        time_ms = np.nan_to_num(ms, nan=0.0).astype(np.int64)
+    else:
+        parsed = pd.to_datetime(raw["truncTime"], errors="coerce").astype("datetime64[ns]")
+        time_ms = parsed.to_numpy().astype("int64") // 1_000_000
+        time_ms[parsed.isna().to_numpy()] = 0
+
+    ids = pd.to_numeric(raw["id"], errors="coerce")
+    id_col = ids.to_numpy(dtype=np.int64) if ids.notna().all() else raw["id"].astype(str).to_numpy()
+
+    page = pd.DataFrame({
+        "time": time_ms,
+        "price": pd.to_numeric(raw["matchPrice"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan),
+        "volume": pd.to_numeric(raw["matchVol"], errors="coerce").fillna(0).to_numpy(dtype=np.int64),
+        "match_type": pd.Categorical(raw["matchType"]),
+        "id": id_col,
+    })
+    next_cursor = raw["truncTime"].iloc[int(np.argmin(time_ms))] if len(raw) else None
+    if isinstance(next_cursor, np.generic):
+        next_cursor = next_cursor.item()  # np.int64 không serialize được vào JSON payload
+    return page, next_cursor
+
+
 # ===================== Reorganized: Global quotes (MSN/Yahoo) =====================
 
 MSN_HEADERS = {
@@ -876,13 +1231,15 @@ class _Wrap:
             self.raw_symbol = raw_symbol
 
         def history(self, start, end, interval="1D"):
-            try:
-                df = _chart_msn(self.sid, start, end, interval)
-                if df is not None and not df.empty:
-                    return df
-            except Exception:
-                pass
-            return _chart_yahoo(self.kind, self.raw_symbol, start, end, interval)
+            # MSN chậm -> hedge sang Yahoo sau ngưỡng p95 thay vì chờ hết timeout
+            return hedged(
+                [
+                    lambda: _chart_msn(self.sid, start, end, interval),
+                    lambda: _chart_yahoo(self.kind, self.raw_symbol, start, end, interval),
+                ],
+                key="msn.chart",
+                valid=lambda df: df is not None and not df.empty,
+            )
 
     def __call__(self, symbol):
         sid = self.id_map.get(symbol)
@@ -920,9 +1277,6 @@ class MSN(Global):
 
 # ===================== Reorganized: quant-data (indices, stocks) =====================
 
-class APIError(Exception):
-    pass
-
 QUANT_BASE_URL = "https://api-v2.xno.vn/quant-data"
 
 def _get_auth_header() -> Dict[str, str]:
@@ -936,8 +1290,9 @@ def _to_unix_timestamp(timestamp: Union[int, float, str, dt.datetime]) -> int:
     if isinstance(timestamp, (int, float)):
         return int(timestamp)
     if isinstance(timestamp, str):
-        dt_obj = dt.datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-        return int(dt_obj.timestamp())
+        timestamp = dt.datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if isinstance(timestamp, dt.date) and not isinstance(timestamp, dt.datetime):
+        timestamp = dt.datetime(timestamp.year, timestamp.month, timestamp.day)
     if isinstance(timestamp, dt.datetime):
         if timestamp.tzinfo is None:
             return int(timestamp.replace(tzinfo=dt.timezone.utc).timestamp())
@@ -946,21 +1301,29 @@ def _to_unix_timestamp(timestamp: Union[int, float, str, dt.datetime]) -> int:
 
 def _make_request(url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
     headers = _get_auth_header()
-    try:
-        response = requests.get(url, headers=headers, params=params, timeout=_TIMEOUT)
+
+    def _fetch() -> requests.Response:
+        response = _http.request("GET", url, headers=headers, params=params, timeout=_TIMEOUT)
         response.raise_for_status()
+        _ = response.content  # đọc hết body để các caller dùng chung Response an toàn
         return response
+
+    try:
+        return get_singleflight().do(request_key("GET", url, params=params, headers=headers), _fetch)
     except requests.RequestException as e:
         raise APIError(f"Request failed: {e}") from e
 
 def _parse_json_response(response: requests.Response) -> Any:
+    return _parse_json_text(response.text)
+
+def _parse_json_text(text: str) -> Any:
     try:
-        data = response.json()
+        data = json.loads(text)
         if "data" not in data:
-            raise APIError(f"API response missing 'data' field: {response.text[:200]}")
+            raise APIError(f"API response missing 'data' field: {text[:200]}")
         return data["data"]
     except ValueError as e:
-        raise APIError(f"Invalid JSON response: {response.text[:200]}") from e
+        raise APIError(f"Invalid JSON response: {text[:200]}") from e
 
 def _create_dataframe_with_columns(
     data: Union[Dict, List],
@@ -987,7 +1350,7 @@ def _chunk_time_range(start_ts: int, end_ts: int, chunk_seconds: int):
 def ping() -> bool:
     try:
         url = f"{QUANT_BASE_URL}/v1/ping"
-        response = requests.get(url, timeout=5)
+        response = _http.request("GET", url, timeout=5)
         return response.ok
     except requests.RequestException:
         return False
@@ -1052,149 +1415,439 @@ query PriceBoard($tickers:[String!]){
 }
 """
 
+_FALLBACK_EMPTY_COLS = [
+    "open", "ceiling", "floor", "high", "low",
+    "foreign_volume", "foreign_room", "foreign_holding_room", "avg_match_volume_2w",
+]
+_FALLBACK_COLS = [
+    "symbol", "open", "ceiling", "floor", "ref_price", "high", "low",
+    "price_change", "price_change_pct",
+    "foreign_volume", "foreign_room", "foreign_holding_room", "avg_match_volume_2w",
+]
+
+
 class Trading:
     @staticmethod
-    def _fallback(symbols):
-        rows = []
+    def _fallback_quote(sym, start, end):
+        """(price, ref) cho 1 mã từ intraday + lịch sử 10 ngày; NaN nếu lỗi/thiếu."""
+        try:
+            q = Quote(sym)
+            tick = q.intraday(page_size=1)
+            price = float(tick["price"].iloc[0]) if not tick.empty else np.nan
+            hist = q.history(start=start, end=end, interval="1D")
+            if len(hist) >= 2:
+                ref = float(hist["close"].iloc[-2])
+            elif len(hist) == 1:
+                ref = float(hist["close"].iloc[-1])
+            else:
+                ref = np.nan
+            return price, ref
+        except Exception:
+            return np.nan, np.nan
+
+    @staticmethod
+    def _fallback(symbols, max_workers: int = 8):
+        symbols = list(symbols)
         now = pd.Timestamp.utcnow()
         start = (now - pd.Timedelta(days=10)).strftime("%Y-%m-%d")
         end = now.strftime("%Y-%m-%d")
-        for sym in symbols:
-            try:
-                q = Quote(sym)
-                tick = q.intraday(page_size=1)
-                price = float(tick["price"].iloc[0]) if not tick.empty else None
-                hist = q.history(start=start, end=end, interval="1D")
-                if len(hist) >= 2:
-                    ref = float(hist["close"].iloc[-2])
-                elif len(hist) == 1:
-                    ref = float(hist["close"].iloc[-1])
-                else:
-                    ref = None
-                change = (
-                    (price - ref) if (price is not None and ref is not None) else None
-                )
-                pct = (
-                    (change / ref * 100.0)
-                    if (change is not None and ref not in (None, 0))
-                    else None
-                )
-                rows.append(
-                    {
-                        "symbol": sym,
-                        "open": None,
-                        "ceiling": None,
-                        "floor": None,
-                        "ref_price": ref,
-                        "high": None,
-                        "low": None,
-                        "price_change": change,
-                        "price_change_pct": pct,
-                        "foreign_volume": None,
-                        "foreign_room": None,
-                        "foreign_holding_room": None,
-                        "avg_match_volume_2w": None,
-                    }
-                )
-            except Exception:
-                rows.append(
-                    {
-                        "symbol": sym,
-                        "open": None,
-                        "ceiling": None,
-                        "floor": None,
-                        "ref_price": None,
-                        "high": None,
-                        "low": None,
-                        "price_change": None,
-                        "price_change_pct": None,
-                        "foreign_volume": None,
-                        "foreign_room": None,
-                        "foreign_holding_room": None,
-                        "avg_match_volume_2w": None,
-                    }
-                )
-        return pd.DataFrame(rows)
+
+        n = len(symbols)
+        price = np.full(n, np.nan)
+        ref = np.full(n, np.nan)
+        if n:
+            # Mỗi mã 2 request độc lập -> chạy song song trên pool, ghép kết quả theo cột
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, n))) as ex:
+                for k, (p, r) in enumerate(ex.map(lambda s: Trading._fallback_quote(s, start, end), symbols)):
+                    price[k], ref[k] = p, r
+
+        change = price - ref
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct = np.where(ref != 0, change / ref * 100.0, np.nan)
+        cols = {"symbol": symbols, "ref_price": ref, "price_change": change, "price_change_pct": pct}
+        for c in _FALLBACK_EMPTY_COLS:
+            cols[c] = [None] * n
+        return pd.DataFrame(cols, columns=_FALLBACK_COLS)
 
     @staticmethod
-    def price_board(symbols):
+    def _board_batch(tickers):
         payload = {
             "operationName": "PriceBoard",
             "query": _PRICEBOARD_QUERY,
-            "variables": {"tickers": list(symbols)},
+            "variables": {"tickers": list(tickers)},
         }
-        try:
-            data = send_request(
-                GRAPHQL_URL,
-                method="POST",
-                headers={"Content-Type": "application/json"},
-                payload=payload,
-            )
-            rows = (data or {}).get("data", {}).get("priceBoard", [])
-            if rows:
-                df = pd.DataFrame(rows).rename(columns=PRICE_INFO_MAP)
-                return df
-        except Exception:
-            pass
-        return Trading._fallback(symbols)
+        data = send_request(
+            GRAPHQL_URL,
+            method="POST",
+            headers={"Content-Type": "application/json"},
+            payload=payload,
+        )
+        return (data or {}).get("data", {}).get("priceBoard", [])
+
+    @staticmethod
+    def price_board(symbols, *, batch_size: int = 100, max_workers: int = 4, fallback_workers: int = 8):
+        """
+        Bảng giá cho danh sách mã.
+
+        Args:
+            symbols: danh sách mã
+            batch_size: số mã mỗi request GraphQL; các batch được gửi song song
+            max_workers: số batch GraphQL chạy đồng thời
+            fallback_workers: số luồng cho fallback theo từng mã (batch lỗi/rỗng)
+        """
+        symbols = list(symbols)
+        if batch_size < 1:
+            raise ValueError("batch_size phải >= 1.")
+        batches = [symbols[k:k + batch_size] for k in range(0, len(symbols), batch_size)]
+
+        rows, failed = [], []
+        if batches:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as ex:
+                futures = [ex.submit(Trading._board_batch, b) for b in batches]
+                for batch, fut in zip(batches, futures):
+                    try:
+                        got = fut.result()
+                    except Exception:
+                        got = None
+                    if got:
+                        rows.extend(got)
+                    else:
+                        failed.extend(batch)
+
+        if not rows:
+            return Trading._fallback(symbols, max_workers=fallback_workers)
+        board = pd.DataFrame(rows).rename(columns=PRICE_INFO_MAP)
+        if not failed:
+            return board
+        # Fallback có bộ cột khác -> đưa về đúng cột GraphQL trước khi ghép
+        fb = Trading._fallback(failed, max_workers=fallback_workers).reindex(columns=board.columns)
+        return pd.concat([board, fb], ignore_index=True)
 
 
 # ===================== Public: get_hist =====================
 
-def get_hist(asset_name: str, resolution: str = "m") -> pd.DataFrame:
+def _iter_page_arrays(
+    symbol: str, res: str, token: str, start_from: int = 0, end_to: int = _END_OF_TIME,
+    pages: Optional[List[int]] = None,
+) -> Iterator[Dict[str, np.ndarray]]:
     """
-    Lấy toàn bộ OHLCV theo khung thời gian 'm' hoặc 'h', KHÔNG còn giới hạn ~500 dòng.
-    - Input:
-        asset_name: ví dụ "HPG"
-        resolution: "m" (phút) hoặc "h" (giờ)  [mặc định: "m"]
-    - Output:
-        DataFrame ["Date","time","Open","High","Low","Close","volume"]
-        (Date/time là string format từ datetime hiện có; KHÔNG đổi timezone)
+    Phân trang theo thời gian từ start_from cho tới khi hết dữ liệu (hoặc vượt end_to);
+    yield từng trang dạng dict mảng ngay khi nhận được.
+    `pages` (tùy chọn): mỗi request được append 1 phần tử (đếm trang cho instrumentation,
+    dùng chung được giữa các luồng).
     """
-    if not isinstance(asset_name, str) or not asset_name.strip():
-        raise ValueError("asset_name phải là chuỗi hợp lệ (ví dụ: 'HPG').")
-    res = (resolution or "m").lower()
-    if res not in {"m", "h"}:
-        raise ValueError("resolution chỉ được phép 'm' hoặc 'h'.")
-
-    token = Config.get_api_key()
-    symbol = asset_name.strip().upper()
-
     step = 60 if res == "m" else 3600  # giây
-    frames: List[pd.DataFrame] = []
 
-    current_from = 0
+    current_from = start_from
     last_epoch_seen = -1
     requests_made = 0
 
     while requests_made < _MAX_REQUESTS:
-        seg = _fetch_segment(symbol, res, current_from, token)
+        text = _fetch_segment_text(symbol, res, current_from, token, end_to)
         requests_made += 1
+        if pages is not None:
+            pages.append(1)
 
-        if seg.empty:
+        cols = _segment_arrays(text)
+        if len(cols["t"]) == 0:
             break
 
-        frames.append(seg)
-
-        seg_last = _extract_last_epoch(seg)
-        if seg_last is None:
-            break
+        yield cols
 
+        seg_last = int(cols["t"].max() // 1_000_000_000)
         if seg_last <= last_epoch_seen:
             break
 
         last_epoch_seen = seg_last
         current_from = seg_last + step
+        if current_from > end_to:
+            break
 
         # Nếu segment nhỏ hơn 500 thì có thể đã gần cuối; vẫn cho vòng lặp tự kết thúc khi hết dữ liệu
 
-    if not frames:
-        return pd.DataFrame(columns=["Date","time","Open","High","Low","Close","volume"])
 
-    df = pd.concat(frames, ignore_index=True)
-    df = df.drop_duplicates(subset=["Date"], keep="last")
-    df = df.sort_values("Date").reset_index(drop=True)
+def _paginate(
+    symbol: str, res: str, token: str, start_from: int = 0, end_to: int = _END_OF_TIME,
+    pages: Optional[List[int]] = None,
+) -> _OHLCVBuffer:
+    """Phân trang toàn bộ [start_from, end_to] vào 1 buffer NumPy."""
+    buf = _OHLCVBuffer()
+    for cols in _iter_page_arrays(symbol, res, token, start_from, end_to, pages):
+        buf.append_arrays(cols)
+    return buf
+
+
+def _paginate_chunked(
+    symbol: str, res: str, token: str, start_ts: int, end_ts: int,
+    *, chunk_seconds: int, max_workers: int, pages: Optional[List[int]] = None,
+) -> _OHLCVBuffer:
+    """
+    Chia [start_ts, end_ts] thành các chunk độc lập (_chunk_time_range), phân trang từng chunk
+    song song rồi ghép vào 1 buffer (to_frame() sẽ sort + dedup phần giáp ranh).
+    """
+    # Mỗi chunk [a, b) -> request from=a, to=b-1 để chunk kề nhau không chồng lấn
+    chunks = [(a, b - 1 if b < end_ts else b) for a, b in _chunk_time_range(start_ts, end_ts, chunk_seconds)]
+    chunks = chunks or [(start_ts, end_ts)]
+    if len(chunks) <= 1 or max_workers <= 1:
+        out = _OHLCVBuffer()
+        for a, b in chunks:
+            out.extend(_paginate(symbol, res, token, start_from=a, end_to=b, pages=pages))
+        return out
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as ex:
+        parts = list(ex.map(
+            lambda ab: _paginate(symbol, res, token, start_from=ab[0], end_to=ab[1], pages=pages), chunks
+        ))
+    out = _OHLCVBuffer(capacity=max(1, sum(len(p) for p in parts)))
+    for p in parts:
+        out.extend(p)
+    return out
+
+
+def _slice_epoch_range(df: pd.DataFrame, start_ts: Optional[int], end_ts: Optional[int]) -> pd.DataFrame:
+    """Cắt df normalize theo [start_ts, end_ts] (epoch giây, None = không giới hạn)."""
+    if df.empty or (start_ts is None and end_ts is None):
+        return df
+    ns = pd.to_datetime(df["Date"]).astype("datetime64[ns]").astype("int64")
+    mask = pd.Series(True, index=df.index)
+    if start_ts is not None:
+        mask &= ns >= start_ts * 1_000_000_000
+    if end_ts is not None:
+        mask &= ns <= end_ts * 1_000_000_000
+    return df[mask].reset_index(drop=True)
+
+
+def get_hist(
+    asset_name: str,
+    resolution: str = "m",
+    *,
+    start: Union[int, float, str, dt.date, dt.datetime, None] = None,
+    end: Union[int, float, str, dt.date, dt.datetime, None] = None,
+    store: Union[OHLCVStore, str, None] = None,
+    output: str = "str",
+    max_workers: int = 4,
+    chunk_days: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    Lấy toàn bộ OHLCV theo khung thời gian 'm' hoặc 'h', KHÔNG còn giới hạn ~500 dòng.
+    - Input:
+        asset_name: ví dụ "HPG"
+        resolution: "m" (phút) hoặc "h" (giờ)  [mặc định: "m"]
+        start, end: giới hạn thời gian (epoch giây, ISO string, date/datetime; naive = UTC).
+               Khi có start, cửa sổ được chia thành các chunk thời gian và tải song song
+               (max_workers luồng, mỗi chunk dài chunk_days ngày; mặc định 7 ngày với 'm',
+               90 ngày với 'h'), sau đó ghép + khử trùng lặp.
+        store: OHLCVStore hoặc thư mục (tùy chọn). Nếu có, đọc dữ liệu đã lưu rồi chỉ tải
+               từ epoch cuối cùng trở đi và ghi phần mới vào store (incremental sync).
+        output: "str" (mặc định) | "datetime" | "epoch"
+        (start/end dùng cùng store: store vẫn sync toàn bộ, kết quả được cắt theo start/end)
+    - Output:
+        "str"      -> DataFrame ["Date","time","Open","High","Low","Close","volume"]
+                      (Date/time là string format từ datetime hiện có; KHÔNG đổi timezone)
+        "datetime" -> DatetimeIndex "datetime", cột ["Open","High","Low","Close","volume"] (OHLC float64)
+        "epoch"    -> DataFrame ["epoch","Open","High","Low","Close","volume"] (epoch int64 giây)
+    """
+    if not isinstance(asset_name, str) or not asset_name.strip():
+        raise ValueError("asset_name phải là chuỗi hợp lệ (ví dụ: 'HPG').")
+    res = (resolution or "m").lower()
+    if res not in {"m", "h"}:
+        raise ValueError("resolution chỉ được phép 'm' hoặc 'h'.")
+    if output not in _OUTPUT_MODES:
+        raise ValueError(f"output chỉ được phép {sorted(_OUTPUT_MODES)}.")
+
+    token = Config.get_api_key()
+    symbol = asset_name.strip().upper()
+    store = _as_store(store)
+
+    start_ts = _to_unix_timestamp(start) if start is not None else None
+    end_ts = _to_unix_timestamp(end) if end is not None else None
+    if start_ts is not None and end_ts is not None and end_ts < start_ts:
+        raise ValueError("end phải >= start.")
+
+    pages: List[int] = []
+    if store is not None:
+        # Tải lại từ bar cuối đã lưu (bao gồm chính nó, vì bar cuối có thể chưa đóng)
+        last = store.last_epoch(symbol, res)
+        buf = _paginate(symbol, res, token, start_from=last if last is not None else 0, pages=pages)
+        get_registry().observe_pages("stocks.get_hist", len(pages))
+        store.append(symbol, res, buf.to_frame())
+        df = store.read(symbol, res, start=start_ts, end=end_ts)
+        return _format_output(_slice_epoch_range(df, start_ts, end_ts), output)
+
+    if start_ts is not None:
+        stop = end_ts if end_ts is not None else int(dt.datetime.now(dt.timezone.utc).timestamp())
+        chunk_seconds = int(chunk_days * 86400) if chunk_days else _CHUNK_SECONDS[res]
+        if chunk_seconds <= 0:
+            raise ValueError("chunk_days phải > 0.")
+        buf = _paginate_chunked(
+            symbol, res, token, start_ts, stop, chunk_seconds=chunk_seconds, max_workers=max_workers, pages=pages
+        )
+    else:
+        buf = _paginate(symbol, res, token, end_to=end_ts if end_ts is not None else _END_OF_TIME, pages=pages)
+    get_registry().observe_pages("stocks.get_hist", len(pages))
+
+    # Đã sort + dedup (keep="last") trong buffer
+    df = _slice_epoch_range(buf.to_frame(), start_ts, end_ts)
 
     # Xuất theo định dạng yêu cầu (KHÔNG đổi timezone)
-    df = _format_date_time_output(df)
-    return df
+    return _format_output(df, output)
+
+
+def iter_hist(
+    asset_name: str,
+    resolution: str = "m",
+    *,
+    start: Union[int, float, str, dt.date, dt.datetime, None] = None,
+    end: Union[int, float, str, dt.date, dt.datetime, None] = None,
+    output: str = "str",
+    chunk_size: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Generator: yield OHLCV theo từng trang ngay khi nhận được (tăng dần theo thời gian),
+    thay vì giữ toàn bộ lịch sử trong bộ nhớ rồi mới trả về.
+    - Input: như get_hist (asset_name, resolution, start, end, output)
+        chunk_size: None -> yield nguyên từng trang (~500 dòng);
+                    N    -> gom lại và yield các khối đúng N dòng (khối cuối có thể ít hơn)
+    - Output: mỗi phần tử là DataFrame cùng định dạng với get_hist(output=...)
+    Lưu ý: bar trùng giữa các trang (hiếm) không được khử ở đây; dùng get_hist nếu cần.
+    """
+    if not isinstance(asset_name, str) or not asset_name.strip():
+        raise ValueError("asset_name phải là chuỗi hợp lệ (ví dụ: 'HPG').")
+    res = (resolution or "m").lower()
+    if res not in {"m", "h"}:
+        raise ValueError("resolution chỉ được phép 'm' hoặc 'h'.")
+    if output not in _OUTPUT_MODES:
+        raise ValueError(f"output chỉ được phép {sorted(_OUTPUT_MODES)}.")
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError("chunk_size phải >= 1.")
+
+    token = Config.get_api_key()
+    symbol = asset_name.strip().upper()
+    start_ts = _to_unix_timestamp(start) if start is not None else 0
+    end_ts = _to_unix_timestamp(end) if end is not None else _END_OF_TIME
+
+    return _iter_hist(symbol, res, token, start_ts, end_ts, output, chunk_size)
+
+
+def _iter_hist(symbol, res, token, start_ts, end_ts, output, chunk_size) -> Iterator[pd.DataFrame]:
+    pending = _OHLCVBuffer()
+    pages: List[int] = []
+    for cols in _iter_page_arrays(symbol, res, token, start_ts, end_ts, pages):
+        if chunk_size is None:
+            page = _OHLCVBuffer(capacity=len(cols["t"]))
+            page.append_arrays(cols)
+            yield _format_output(_slice_epoch_range(page.to_frame(), start_ts, end_ts), output)
+            continue
+        pending.append_arrays(cols)
+        while len(pending) >= chunk_size:
+            df = pending.to_frame()
+            yield _format_output(df.iloc[:chunk_size].reset_index(drop=True), output)
+            pending = _OHLCVBuffer()
+            pending.append_frame(df.iloc[chunk_size:])
+    get_registry().observe_pages("stocks.iter_hist", len(pages))
+    if chunk_size is not None and len(pending):
+        yield _format_output(_slice_epoch_range(pending.to_frame(), start_ts, end_ts), output)
+
+
+def get_hist_many(
+    symbols: Iterable[str],
+    resolution: str = "m",
+    *,
+    max_workers: int = 8,
+    start: Union[int, float, str, dt.date, dt.datetime, None] = None,
+    end: Union[int, float, str, dt.date, dt.datetime, None] = None,
+    store: Union[OHLCVStore, str, None] = None,
+    output: str = "str",
+    as_frame: bool = False,
+) -> Tuple[Union[Dict[str, pd.DataFrame], pd.DataFrame], Dict[str, Exception]]:
+    """
+    Lấy OHLCV cho nhiều mã cùng lúc trên thread pool giới hạn (mỗi mã chạy get_hist riêng).
+    - Input:
+        symbols: danh sách mã, ví dụ ["HPG", "VCB"]
+        resolution: "m" hoặc "h"
+        max_workers: số luồng tối đa
+        start, end: truyền thẳng cho get_hist (mỗi mã tải tuần tự trong cửa sổ, song song giữa các mã)
+        store: truyền thẳng cho get_hist (incremental sync)
+        output: truyền thẳng cho get_hist ("str" | "datetime" | "epoch")
+        as_frame: True -> trả về 1 DataFrame dạng long có cột "symbol"
+    - Output:
+        (data, errors)
+        data: {symbol: DataFrame} hoặc DataFrame long nếu as_frame=True
+        errors: {symbol: Exception} cho các mã lỗi (không làm hỏng cả batch)
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers phải >= 1.")
+    syms = list(dict.fromkeys(s.strip().upper() for s in symbols if isinstance(s, str) and s.strip()))
+    store = _as_store(store)
+    Config.get_api_key()  # báo lỗi sớm nếu chưa set key, thay vì lỗi ở từng mã
+
+    results: Dict[str, pd.DataFrame] = {}
+    errors: Dict[str, Exception] = {}
+    if syms:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(syms))) as ex:
+            futs = {
+                ex.submit(get_hist, sym, resolution, start=start, end=end, store=store, output=output, max_workers=1): sym
+                for sym in syms
+            }
+            for fut in as_completed(futs):
+                sym = futs[fut]
+                try:
+                    results[sym] = fut.result()
+                except Exception as e:
+                    errors[sym] = e
+
+    # Giữ thứ tự input
+    ordered = {sym: results[sym] for sym in syms if sym in results}
+    if not as_frame:
+        return ordered, errors
+
+    frames = [df.assign(symbol=sym) for sym, df in ordered.items() if not df.empty]
+    if not frames:
+        empty = _format_output(pd.DataFrame(), output).assign(symbol=pd.Series(dtype=object))
+        return empty[["symbol"] + [c for c in empty.columns if c != "symbol"]], errors
+    long = pd.concat(frames, ignore_index=(output != "datetime"))
+    return long[["symbol"] + [c for c in long.columns if c != "symbol"]], errors
+
+
+def get_intraday_many(
+    symbols: Iterable[str],
+    *,
+    page_size: int = 1000,
+    max_workers: int = 8,
+    as_frame: bool = False,
+) -> Tuple[Union[Dict[str, pd.DataFrame], pd.DataFrame], Dict[str, Exception]]:
+    """
+    Lấy toàn bộ tick trong phiên (Quote.intraday_all) cho nhiều mã song song.
+    - Input:
+        symbols: danh sách mã, ví dụ rổ VN30
+        page_size: số tick mỗi request khi phân trang
+        max_workers: số luồng tối đa (mỗi mã phân trang tuần tự, song song giữa các mã)
+        as_frame: True -> 1 DataFrame dạng long có cột "symbol" (category)
+    - Output:
+        (data, errors) như get_hist_many
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers phải >= 1.")
+    syms = list(dict.fromkeys(s.strip().upper() for s in symbols if isinstance(s, str) and s.strip()))
+
+    results: Dict[str, pd.DataFrame] = {}
+    errors: Dict[str, Exception] = {}
+    if syms:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(syms))) as ex:
+            futs = {ex.submit(Quote(sym).intraday_all, page_size): sym for sym in syms}
+            for fut in as_completed(futs):
+                sym = futs[fut]
+                try:
+                    results[sym] = fut.result()
+                except Exception as e:
+                    errors[sym] = e
+
+    ordered = {sym: results[sym] for sym in syms if sym in results}
+    if not as_frame:
+        return ordered, errors
+
+    frames = [df.assign(symbol=sym) for sym, df in ordered.items() if not df.empty]
+    long = pd.concat(frames, ignore_index=True) if frames else _intraday_empty().assign(symbol=pd.Series(dtype=object))
+    long["symbol"] = long["symbol"].astype("category")
+    long["match_type"] = long["match_type"].astype("category")
+    return long[["symbol"] + [c for c in long.columns if c != "symbol"]], errors
@@ -0,0 +1,244 @@
+"""
+store.py — Kho OHLCV cục bộ dạng cột (Parquet/Feather) cho stocks.get_hist.
+
+Mỗi cặp (symbol, resolution) là một partition riêng, chia file theo kỳ:
+    <root>/<resolution>/<SYMBOL>/<YYYY-MM>.parquet   (resolution phút, vd. "m", "5m")
+    <root>/<resolution>/<SYMBOL>/<YYYY>.parquet      (giờ/ngày...)
+(hoặc .feather). Sync tăng dần chỉ ghi lại file của kỳ có bar mới, không ghi lại
+toàn bộ lịch sử; partition một file của phiên bản cũ được tự chuyển sang dạng này.
+
+Dữ liệu lưu ở dạng đã normalize: Date (datetime), Open, High, Low, Close, Volume; cột
+khác (nếu có) được giữ nguyên sau các cột này.
+Cần `pyarrow` (pip install pyarrow).
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+__all__ = ["OHLCVStore"]
+
+_COLUMNS = ["Date", "Open", "High", "Low", "Close", "Volume"]
+_FORMATS = {"parquet": ".parquet", "feather": ".feather"}
+
+
+def _with_extras(df: pd.DataFrame) -> List[str]:
+    """_COLUMNS trước, rồi các cột khác của df theo thứ tự sẵn có."""
+    return _COLUMNS + [c for c in df.columns if c not in _COLUMNS]
+
+
+def _monthly(resolution: str) -> bool:
+    # Dữ liệu phút nhiều dòng -> file theo tháng; còn lại theo năm
+    return resolution.strip().lower().endswith("m")
+
+
+def _period_keys(dates: pd.Series, monthly: bool) -> pd.Series:
+    d = pd.to_datetime(dates)
+    if monthly:
+        return d.dt.strftime("%Y-%m")
+    return d.dt.strftime("%Y")
+
+
+def _epoch_key(epoch: int, monthly: bool) -> str:
+    ts = pd.Timestamp(int(epoch), unit="s")
+    return ts.strftime("%Y-%m" if monthly else "%Y")
+
+
+class OHLCVStore:
+    """
+    Local columnar store for normalized OHLCV bars, one directory per (symbol, resolution)
+    holding one file per month (minute data) or per year.
+
+    Parameters
+    ----------
+    root : str
+        Directory holding the partitions (created on first write).
+    fmt : str, optional
+        "parquet" (default) or "feather".
+    """
+
+    def __init__(self, root: str, fmt: str = "parquet"):
+        if fmt not in _FORMATS:
+            raise ValueError(f"fmt chỉ được phép {sorted(_FORMATS)}.")
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.fmt = fmt
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._last: Dict[str, Optional[int]] = {}  # partition -> epoch bar cuối (cache)
+
+    def __repr__(self) -> str:
+        return f"OHLCVStore(root={self.root!r}, fmt={self.fmt!r})"
+
+    # ───────────────────────── Public API ─────────────────────────
+
+    def path(self, symbol: str, resolution: str) -> str:
+        """Return the partition directory for (symbol, resolution)."""
+        return os.path.join(self.root, resolution.lower(), symbol.strip().upper())
+
+    def read(
+        self,
+        symbol: str,
+        resolution: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Read a partition; empty DataFrame if it does not exist yet.
+
+        `start`/`end` (epoch giây, tùy chọn) chỉ đọc các file kỳ giao với khoảng đó (nới
+        thêm 1 ngày mỗi phía cho Date theo giờ địa phương); caller tự cắt chính xác theo Date.
+        """
+        p = self.path(symbol, resolution)
+        monthly = _monthly(resolution)
+        with self._lock_for(p):
+            self._migrate(p, monthly)
+            names = self._files(p)
+            if start is not None:
+                lo = _epoch_key(start - 86400, monthly)
+                names = [n for n in names if self._key(n) >= lo]
+            if end is not None:
+                hi = _epoch_key(end + 86400, monthly)
+                names = [n for n in names if self._key(n) <= hi]
+            frames = [self._read_file(os.path.join(p, n)) for n in names]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=_COLUMNS)
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def last_epoch(self, symbol: str, resolution: str) -> Optional[int]:
+        """Epoch (giây) của bar cuối cùng đã lưu, None nếu chưa có dữ liệu."""
+        p = self.path(symbol, resolution)
+        with self._lock_for(p):
+            if p not in self._last:
+                self._migrate(p, _monthly(resolution))
+                self._last[p] = self._scan_last(p)
+            return self._last[p]
+
+    def modified(self, symbol: str, resolution: str) -> Optional[float]:
+        """Thời điểm (epoch) partition được ghi gần nhất; None nếu chưa có dữ liệu."""
+        p = self.path(symbol, resolution)
+        times = []
+        for n in self._files(p):
+            try:
+                times.append(os.path.getmtime(os.path.join(p, n)))
+            except OSError:
+                pass
+        return max(times) if times else None
+
+    def append(self, symbol: str, resolution: str, new: pd.DataFrame) -> None:
+        """
+        Gộp `new` vào partition (bar trùng Date -> giữ bản mới). Chỉ file của các kỳ có
+        bar trong `new` được đọc và ghi lại.
+        """
+        if new.empty:
+            return
+        p = self.path(symbol, resolution)
+        monthly = _monthly(resolution)
+        new = new.assign(Date=pd.to_datetime(new["Date"]))
+        keys = _period_keys(new["Date"], monthly)
+        with self._lock_for(p):
+            self._migrate(p, monthly)
+            for key, part in new.groupby(keys.to_numpy(), sort=True):
+                f = os.path.join(p, key + _FORMATS[self.fmt])
+                if os.path.exists(f):
+                    part = pd.concat([self._read_file(f), part], ignore_index=True)
+                self._write_file(f, self._normalize(part))
+            new_last = int(new["Date"].astype("datetime64[ns]").astype("int64").max() // 1_000_000_000)
+            if p in self._last and self._last[p] is not None:
+                self._last[p] = max(self._last[p], new_last)
+            else:
+                self._last[p] = self._scan_last(p)
+
+    def delete(self, symbol: str, resolution: str) -> None:
+        """Xóa partition (nếu có) để lần get_hist sau tải lại từ đầu."""
+        p = self.path(symbol, resolution)
+        with self._lock_for(p):
+            if os.path.isdir(p):
+                shutil.rmtree(p)
+            legacy = p + _FORMATS[self.fmt]
+            if os.path.exists(legacy):
+                os.remove(legacy)
+            self._last.pop(p, None)
+
+    # ───────────────────────── Internals ─────────────────────────
+
+    def _lock_for(self, p: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(p)
+            if lock is None:
+                lock = self._locks[p] = threading.Lock()
+            return lock
+
+    def _key(self, name: str) -> str:
+        return name[: -len(_FORMATS[self.fmt])]
+
+    def _files(self, p: str) -> List[str]:
+        ext = _FORMATS[self.fmt]
+        try:
+            return sorted(n for n in os.listdir(p) if n.endswith(ext))
+        except OSError:
+            return []
+
+    def _scan_last(self, p: str) -> Optional[int]:
+        # Chỉ đọc cột Date của file kỳ mới nhất
+        for name in reversed(self._files(p)):
+            dates = self._read_file(os.path.join(p, name), columns=["Date"])["Date"]
+            if len(dates):
+                ns = pd.to_datetime(dates).astype("datetime64[ns]").astype("int64").max()
+                return int(ns // 1_000_000_000)
+        return None
+
+    def _migrate(self, p: str, monthly: bool) -> None:
+        """Partition một file (<SYMBOL>.parquet, bản cũ) -> các file theo kỳ."""
+        legacy = p + _FORMATS[self.fmt]
+        if not os.path.exists(legacy):
+            return
+        df = self._read_file(legacy)
+        if not df.empty:
+            df = df.assign(Date=pd.to_datetime(df["Date"]))
+            for key, part in df.groupby(_period_keys(df["Date"], monthly).to_numpy(), sort=True):
+                self._write_file(os.path.join(p, key + _FORMATS[self.fmt]), self._normalize(part))
+        os.remove(legacy)
+        self._last.pop(p, None)
+
+    @staticmethod
+    def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.drop_duplicates(subset=["Date"], keep="last")
+        return df.sort_values("Date").reset_index(drop=True).reindex(columns=_with_extras(df))
+
+    def _read_file(self, p: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        try:
+            if self.fmt == "parquet":
+                df = pd.read_parquet(p, columns=columns)
+            else:
+                df = pd.read_feather(p, columns=columns)
+        except ImportError as e:
+            raise ImportError("Thiếu thư viện 'pyarrow'. Hãy cài: pip install pyarrow") from e
+        return df if columns is not None else df.reindex(columns=_with_extras(df))
+
+    def _write_file(self, p: str, df: pd.DataFrame) -> None:
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = f"{p}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if self.fmt == "parquet":
+                df.to_parquet(tmp, index=False)
+            else:
+                df.to_feather(tmp)
+        except ImportError as e:
+            raise ImportError("Thiếu thư viện 'pyarrow'. Hãy cài: pip install pyarrow") from e
+        # Ghi nguyên tử: reader không bao giờ thấy file ghi dở
+        os.replace(tmp, p)
+
+
+def _as_store(store: Union["OHLCVStore", str, None]) -> Optional["OHLCVStore"]:
+    """Chấp nhận OHLCVStore, đường dẫn thư mục, hoặc None."""
+    if store is None or isinstance(store, OHLCVStore):
+        return store
+    if isinstance(store, (str, os.PathLike)):
+        return OHLCVStore(os.fspath(store))
+    raise TypeError(f"store phải là OHLCVStore hoặc đường dẫn, nhận {type(store)}")
@@ -1,8 +1,22 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
 import urllib.error
 import urllib.request
-from typing import Iterable, Optional
+from typing import Dict, Iterable, Optional
+
+from .instrument import get_registry
+
+__all__ = ["APIKeyNotSetError", "InvalidAPIKeyError", "Config", "client"]
+
+# Token xác thực key lưu trên đĩa, dùng chung giữa các process worker
+_TOKEN_DIR = os.path.join("~", ".cache", "xnoapi", "apikey")
+_TOKEN_TTL = 900.0  # giây
 
 
 class APIKeyNotSetError(ValueError):
@@ -13,6 +27,10 @@ class InvalidAPIKeyError(ValueError):
     """Raised when API key is invalid or unauthorized."""
 
 
+class APIError(Exception):
+    """Lỗi khi gọi API dữ liệu (request lỗi, response sai dạng, hết thời gian chờ...)."""
+
+
 class Config:
     """
     Configuration class for managing the API key and providing the API endpoint.
@@ -22,6 +40,9 @@ class Config:
     """
 
     _api_key: Optional[str] = None
+    # Ghi đè base URL (replay.redirect dùng để trỏ về server giả lập cục bộ)
+    _link: Optional[str] = None
+    _link_data: Optional[str] = None
 
     # ───────────────────────── Public API ─────────────────────────
 
@@ -43,11 +64,16 @@ class Config:
             "/list-liquid-asset",
         ),
         timeout: float = 5.0,
+        token_ttl: float = _TOKEN_TTL,
     ):
         """
         Set the API key. If `verify=True` (default), the key is validated online
         BEFORE being saved. If invalid, raise and DO NOT save the key.
 
+        Một lần xác thực thành công được ghi thành token trên đĩa (hash của key + hạn dùng
+        `token_ttl` giây), nên các process worker song song không probe lại cùng một key.
+        `token_ttl=0` để luôn probe.
+
         Raises:
             ValueError: Empty key.
             InvalidAPIKeyError: Key sai/unauthorized.
@@ -65,6 +91,7 @@ class Config:
                 scheme=scheme,
                 probe_paths=probe_paths,
                 timeout=timeout,
+                token_ttl=token_ttl,
             )
 
         # Ok -> lưu
@@ -87,12 +114,12 @@ class Config:
     @classmethod
     def get_link(cls) -> str:
         """Return the API base URL."""
-        return "https://d16sdkoet71cxx.cloudfront.net"
+        return cls._link or "https://d16sdkoet71cxx.cloudfront.net"
 
     @classmethod
     def get_link_data(cls) -> str:
         """Return the API base URL."""
-        return "https://api-v2.xno.vn/quant-data/v1/stocks"
+        return cls._link_data or "https://api-v2.xno.vn/quant-data/v1/stocks"
 
     # ───────────────────────── Internals ─────────────────────────
 
@@ -109,6 +136,36 @@ class Config:
             return {"Authorization": value}
         return {header: key}
 
+    @classmethod
+    def _token_path(cls, key: str, *, header: str, scheme: Optional[str]) -> str:
+        """File token của (base URL, header, scheme, key); tên file là sha256, không chứa key."""
+        ident = "\n".join((cls.get_link_data(), header.lower(), scheme or "", key))
+        digest = hashlib.sha256(ident.encode("utf-8")).hexdigest()
+        return os.path.join(os.path.expanduser(_TOKEN_DIR), f"{digest}.json")
+
+    @staticmethod
+    def _token_valid(path: str) -> bool:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return float(json.load(f)["expires"]) > time.time()
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    @staticmethod
+    def _write_token(path: str, ttl: float) -> None:
+        # Best-effort: thư mục chỉ đọc/không ghi được thì bỏ qua
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"expires": time.time() + ttl}, f)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
     @classmethod
     def _probe_api_key(
         cls,
@@ -118,36 +175,83 @@ class Config:
         scheme: Optional[str] = None,
         probe_paths: Iterable[str] = ("/v1/ping", "/ping", "/healthz", "/status", "/"),
         timeout: float = 5.0,
+        token_ttl: float = _TOKEN_TTL,
     ) -> bool:
         """
         Validate a PROVIDED API key (không đòi hỏi key đã được set).
-        - 2xx: hợp lệ -> return True
+
+        Các probe path được gửi đồng thời; câu trả lời dứt khoát đầu tiên quyết định:
+        - 2xx: hợp lệ -> return True (và ghi token lên đĩa nếu token_ttl > 0)
         - 401/403: raise InvalidAPIKeyError
-        - 404/405/...: thử path kế tiếp
-        - Lỗi mạng: raise ConnectionError
+        - 404/405/...: chờ các path còn lại
+        - Không path nào dứt khoát mà có lỗi mạng/response hỏng: raise ConnectionError
+        - Quá 2 x timeout mà chưa đủ câu trả lời: raise APIError
         """
+        token = cls._token_path(key, header=header, scheme=scheme) if token_ttl > 0 else None
+        if token is not None:
+            valid = cls._token_valid(token)
+            get_registry().observe_cache("apikey_token", "hit" if valid else "miss")
+            if valid:
+                return True
+
         base = cls.get_link_data().rstrip("/")
         headers = cls._build_headers_for_key(key, header=header, scheme=scheme)
+        urls = [base + (p if p.startswith("/") else f"/{p}") for p in probe_paths]
+        if not urls:
+            return True
 
-        for path in probe_paths:
-            url = base + (path if path.startswith("/") else f"/{path}")
-            req = urllib.request.Request(url=url, method="GET", headers=headers)
+        done: "queue.Queue[tuple]" = queue.Queue()
+
+        def _probe(url: str) -> None:
+            t0 = time.monotonic()
+            code, nbytes, item = None, 0, None
             try:
+                req = urllib.request.Request(url=url, method="GET", headers=headers)
                 with urllib.request.urlopen(req, timeout=timeout) as resp:
+                    # Chỉ cần status: không đọc body, số byte lấy theo Content-Length
                     code = getattr(resp, "status", 200)
-                    if 200 <= code < 300:
-                        return True
+                    length = resp.headers.get("Content-Length")
+                    nbytes = int(length) if length and length.isdigit() else 0
+                item = (url, code, None)
             except urllib.error.HTTPError as e:
-                if e.code in (401, 403):
-                    raise InvalidAPIKeyError(
-                        f"Invalid API key (HTTP {e.code}) for {url}"
-                    ) from e
-                # 404/405/...: thử path tiếp theo
-                continue
-            except urllib.error.URLError as e:
-                raise ConnectionError(
-                    f"Failed to validate API key against {url}: {e}"
-                ) from e
+                code, item = e.code, (url, e.code, e)
+            except Exception as e:  # URLError, BadStatusLine, InvalidURL, ValueError...
+                code, item = type(e).__name__, (url, None, e)
+            finally:
+                # Luôn trả lời caller, kể cả khi ghi metric lỗi
+                try:
+                    get_registry().observe_request(
+                        "GET", url, status=code, seconds=time.monotonic() - t0, bytes_in=nbytes
+                    )
+                finally:
+                    done.put(item if item is not None else (url, None, None))
+
+        # Thread daemon: probe thua cuộc tự kết thúc theo timeout, không chặn caller
+        for url in urls:
+            threading.Thread(target=_probe, args=(url,), daemon=True, name="xnoapi-keyprobe").start()
+
+        net_error = None
+        deadline = time.monotonic() + 2 * timeout  # connect + đọc status, mỗi bước tối đa `timeout`
+        for answered in range(len(urls)):
+            try:
+                url, code, err = done.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise APIError(
+                    f"API key validation timed out after {2 * timeout:g}s "
+                    f"({len(urls) - answered}/{len(urls)} probe chưa trả lời)"
+                ) from None
+            if code is not None and 200 <= code < 300:
+                if token is not None:
+                    cls._write_token(token, token_ttl)
+                return True
+            if code in (401, 403):
+                raise InvalidAPIKeyError(f"Invalid API key (HTTP {code}) for {url}") from err
+            if code is None and net_error is None:
+                net_error = (url, err)
+
+        if net_error is not None:
+            url, err = net_error
+            raise ConnectionError(f"Failed to validate API key against {url}: {err}") from err
 
         # Không thấy 401/403 -> chấp nhận tạm (endpoint health có thể không tồn tại)
         return True
@@ -159,13 +263,19 @@ class Config:
         scheme: Optional[str] = None,
         probe_paths: Iterable[str] = ("/v1/ping", "/ping", "/healthz", "/status", "/"),
         timeout: float = 5.0,
+        token_ttl: float = _TOKEN_TTL,
     ) -> bool:
         """
         Giữ lại bản validate dựa trên key đã lưu (backward-compatible).
         """
         key = cls.get_api_key()  # may raise APIKeyNotSetError
         return cls._probe_api_key(
-            key, header=header, scheme=scheme, probe_paths=probe_paths, timeout=timeout
+            key,
+            header=header,
+            scheme=scheme,
+            probe_paths=probe_paths,
+            timeout=timeout,
+            token_ttl=token_ttl,
         )
 
 
@@ -184,11 +294,22 @@ def client(
         "/list-liquid-asset",
     ),
     timeout: float = 5.0,
+    token_ttl: float = _TOKEN_TTL,
+    pool_maxsize: Optional[int] = None,
+    host_pool_sizes: Optional[Dict[str, int]] = None,
 ):
     """
     Convenience: set (and by default verify) the API key.
     Nếu key sai -> raise InvalidAPIKeyError và KHÔNG lưu key.
+    Các probe chạy song song; kết quả hợp lệ được cache trên đĩa `token_ttl` giây.
+
+    `pool_maxsize` / `host_pool_sizes` chỉnh connection pool của HTTP session dùng chung
+    (nên >= số luồng tải song song, ví dụ max_workers của get_hist_many).
     """
+    if pool_maxsize is not None or host_pool_sizes is not None:
+        from .session import configure_session
+
+        configure_session(pool_maxsize=pool_maxsize, host_pool_sizes=host_pool_sizes)
     Config.set_api_key(
         apikey,
         verify=verify,
@@ -196,4 +317,5 @@ def client(
         scheme=scheme,
         probe_paths=probe_paths,
         timeout=timeout,
+        token_ttl=token_ttl,
     )
@@ -2,10 +2,35 @@
 import logging
 from abc import abstractmethod
 from typing import TypedDict, List, Dict, Union
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+
+def _to_datetime_index(df: pd.DataFrame, coerce: bool = False) -> pd.DataFrame:
+    """
+    Đặt index "datetime" cho df, chấp nhận cả 3 dạng output của get_hist:
+    DatetimeIndex (output="datetime"), cột epoch giây (output="epoch"),
+    hoặc cặp cột string Date/time (mặc định).
+    Date/time không parse được: raise nếu coerce=False; nếu coerce=True thì bỏ các dòng đó
+    và log warning kèm số dòng bị bỏ.
+    """
+    if isinstance(df.index, pd.DatetimeIndex):
+        dt_index = df.index
+    elif "epoch" in df.columns:
+        dt_index = pd.to_datetime(df["epoch"], unit="s")
+    else:
+        dt_index = pd.to_datetime(
+            df["Date"].astype(str) + " " + df["time"].astype(str), errors="coerce" if coerce else "raise"
+        )
+    df = df.copy()
+    df.index = pd.DatetimeIndex(dt_index, name="datetime")
+    bad = int(df.index.isna().sum())
+    if bad:
+        logging.warning("Bỏ %d/%d dòng có Date/time không hợp lệ.", bad, len(df))
+        df = df[df.index.notna()]
+    return df
+
+
 class Backtest_Derivates:
     """
     A class for backtesting derivatives trading strategies.
@@ -37,10 +62,8 @@ class Backtest_Derivates:
         if pnl_type not in ["raw", "after_fees"]:
             raise ValueError("Invalid pnl_type. Choose 'raw' or 'after_fees'.")
 
-        self.df = df.copy()
         self.pnl_type = pnl_type
-        self.df["datetime"] = pd.to_datetime(self.df["Date"] + " " + self.df["time"])
-        self.df.set_index("datetime", inplace=True)
+        self.df = _to_datetime_index(df)
         self.df.sort_index(inplace=True)
 
         # Calculate raw PNL
@@ -151,10 +174,7 @@ class Backtest_Stock:
         self.min_hold_days = int(min_hold_days)
 
         # Chuẩn hóa thời gian & index
-        self.df = df.copy()
-        self.df["datetime"] = pd.to_datetime(self.df["Date"].astype(str) + " " + self.df["time"].astype(str), errors="coerce")
-        self.df = self.df.dropna(subset=["datetime"])
-        self.df.set_index("datetime", inplace=True)
+        self.df = _to_datetime_index(df, coerce=True)
         self.df.sort_index(inplace=True)
 
         # Long-only ý định
@@ -311,6 +331,8 @@ class Backtest_Stock:
             y = eq.values
             x_label = "Time"
 
+        import matplotlib.pyplot as plt  # import khi vẽ, tránh làm chậm `import xnoapi`
+
         plt.figure(figsize=(10, 4))
         plt.plot(x, y, linewidth=1.4)
         plt.title(title)